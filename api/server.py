@@ -0,0 +1,195 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
+import pyarrow as pa
+import tornado.ioloop
+import tornado.web
+from cachetools import LRUCache, TTLCache
+
+from scraper.db import ALL_SEASONS, get_conn
+
+SEASON = os.environ.get("SEASON", "2025/2026")
+LEAGUE = os.environ.get("LEAGUE", "ligue-1")
+PORT = int(os.environ.get("API_PORT", "8000"))
+# Durée pendant laquelle un client peut réutiliser une réponse sans revalider son ETag
+MAX_AGE = int(os.environ.get("API_MAX_AGE", "10"))
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+# Ressource -> (page dont le run publié versionne les données, requête)
+# Seulement des colonnes copiées dans les lignes du run (pas players/teams, mis à jour par chaque scraping) :
+# pour un run donné, les octets ne changent jamais et l'ETag reste un validateur fort.
+# Chaque ORDER BY se termine par une colonne unique dans le run : pas d'ex aequo, donc un seul ordre possible.
+RESOURCES = {
+    "standings": ("standings", """
+        SELECT s.rank, s.team, s.played, s.wins, s.draws, s.losses,
+               s.goals_for, s.goals_against, s.goal_diff, s.points, s.logo_url, s.scraped_at
+        FROM standings s
+        WHERE s.run_id = %(run_id)s AND s.league = %(league)s AND s.season = %(season)s
+        ORDER BY s.rank, s.id;
+    """),
+    "scorers": ("scorers", """
+        SELECT s.rank, s.player_name, s.goals, s.penalties, s.photo_url, s.logo_url, s.scraped_at
+        FROM scorers s
+        WHERE s.run_id = %(run_id)s AND s.league = %(league)s AND s.season = %(season)s
+        ORDER BY s.goals DESC, s.rank, s.id;
+    """),
+    "assists": ("assists", """
+        SELECT a.rank, a.player_name, a.assists, a.photo_url, a.logo_url, a.scraped_at
+        FROM assists a
+        WHERE a.run_id = %(run_id)s AND a.league = %(league)s AND a.season = %(season)s
+        ORDER BY a.assists DESC, a.rank, a.id;
+    """),
+    "palmares/clubs": ("palmares", """
+        SELECT team, titles, logo_url, scraped_at
+        FROM palmares_clubs
+        WHERE run_id = %(run_id)s AND titles < 30
+        ORDER BY titles DESC, team;
+    """),
+    "palmares/history": ("palmares", """
+        SELECT season, winner, winner_logo, runner_up, runner_up_logo, scraped_at
+        FROM palmares_history
+        WHERE run_id = %(run_id)s
+        ORDER BY season DESC;
+    """),
+}
+
+# Pointeurs publiés : relus au plus toutes les 2 s. Réponses déjà sérialisées : indexées par ETag.
+# (un run publié ne change plus, une entrée du cache de réponses n'est donc jamais périmée)
+_runs_cache = TTLCache(maxsize=64, ttl=2)
+_body_cache = LRUCache(maxsize=256)
+_lock = threading.Lock()
+
+
+def published_runs(league: str, season: str):
+    key = (league, season)
+    with _lock:
+        if key in _runs_cache:
+            return _runs_cache[key]
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT page, run_id FROM published_runs WHERE league = %s AND season IN (%s, %s);",
+                (league, season, ALL_SEASONS),
+            )
+            runs = dict(cur.fetchall())
+    finally:
+        conn.close()
+
+    with _lock:
+        _runs_cache[key] = runs
+    return runs
+
+
+def fetch_rows(sql: str, params: dict):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def to_json(rows) -> bytes:
+    return json.dumps(rows, default=str, ensure_ascii=False).encode("utf-8")
+
+
+def to_arrow(rows) -> bytes:
+    table = pa.Table.from_pylist(rows)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def make_etag(resource: str, league: str, season: str, run_id: int, fmt: str) -> str:
+    # Les lignes d'un run ne changent plus une fois publiées : (ressource, run, format) identifie les octets
+    raw = f"{resource}|{league}|{season}|{run_id}|{fmt}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def current_etag(resource: str, league: str, season: str, fmt: str):
+    """Renvoie (etag, run_id) : seulement la lecture (en cache) des pointeurs publiés."""
+    page, _ = RESOURCES[resource]
+    run_id = published_runs(league, season).get(page, -1)
+    return make_etag(resource, league, season, run_id, fmt), run_id
+
+
+def render(resource: str, league: str, season: str, fmt: str, etag: str, run_id: int) -> bytes:
+    """Corps de la réponse, calculé une seule fois par (ressource, run, format)."""
+    with _lock:
+        body = _body_cache.get(etag)
+    if body is None:
+        _, sql = RESOURCES[resource]
+        rows = fetch_rows(sql, {"run_id": run_id, "league": league, "season": season})
+        body = to_arrow(rows) if fmt == "arrow" else to_json(rows)
+        with _lock:
+            _body_cache[etag] = body
+    return body
+
+
+class ResourceHandler(tornado.web.RequestHandler):
+    def wants_arrow(self) -> bool:
+        fmt = self.get_query_argument("format", None)
+        if fmt:
+            return fmt == "arrow"
+        return ARROW_MIME in self.request.headers.get("Accept", "")
+
+    async def get(self, resource):
+        if resource not in RESOURCES:
+            raise tornado.web.HTTPError(404)
+
+        league = self.get_query_argument("league", LEAGUE)
+        season = self.get_query_argument("season", SEASON)
+        fmt = "arrow" if self.wants_arrow() else "json"
+
+        # psycopg2 est bloquant : on interroge la base hors de la boucle d'événements
+        loop = tornado.ioloop.IOLoop.current()
+        etag, run_id = await loop.run_in_executor(None, current_etag, resource, league, season, fmt)
+
+        self.set_header("ETag", etag)
+        self.set_header("Cache-Control", f"public, max-age={MAX_AGE}")
+        self.set_header("Vary", "Accept")
+        # Le client a déjà cette version : ni requête de données ni corps.
+        # If-None-Match se compare en mode faible (un proxy peut avoir ajouté W/ devant l'ETag)
+        if_none_match = [t.strip().removeprefix("W/") for t in self.request.headers.get("If-None-Match", "").split(",")]
+        if etag in if_none_match or "*" in if_none_match:
+            self.set_status(304)
+            return
+
+        body = await loop.run_in_executor(None, render, resource, league, season, fmt, etag, run_id)
+        self.set_header("Content-Type", ARROW_MIME if fmt == "arrow" else "application/json; charset=utf-8")
+        self.write(body)
+
+    def compute_etag(self):
+        # ETag géré à la main (dérivé du run publié), pas de hash du corps par Tornado
+        return None
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write({"status": "ok", "league": LEAGUE, "season": SEASON})
+
+
+def make_app():
+    return tornado.web.Application([
+        (r"/health", HealthHandler),
+        (r"/(standings|scorers|assists|palmares/clubs|palmares/history)", ResourceHandler),
+    ])
+
+
+def main():
+    make_app().listen(PORT, address="0.0.0.0")
+    print(f"API en écoute sur le port {PORT} ({LEAGUE} {SEASON})")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
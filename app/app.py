@@ -21,6 +21,7 @@ def load_css():
 load_css()
 
 SEASON = os.environ.get("SEASON", "2025/2026")
+LEAGUE = os.environ.get("LEAGUE", "ligue-1")
 
 # DB
 
@@ -33,7 +34,9 @@ def get_conn():
         port=int(os.environ.get("POSTGRES_PORT", "5432")),
     )
 
-@st.cache_data(ttl=60) # cela évite de taper la DB à chaque interaction
+# Les requêtes contiennent le run_id publié : une nouvelle publication change la requête, donc la clé de cache.
+# Le TTL peut être long, il ne sert plus qu'à libérer la mémoire.
+@st.cache_data(ttl=3600)
 def load_df(query: str):
     conn = get_conn()
     try:
@@ -41,6 +44,25 @@ def load_df(query: str):
     finally:
         conn.close()
 
+@st.cache_data(ttl=5)
+def load_published_runs(league: str, season: str):
+    """Run publié pour chaque page, lu en une seule requête : toutes les pages viennent du même instantané."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT page, run_id FROM published_runs WHERE league = %s AND season IN (%s, '*');",
+                (league, season),
+            )
+            return dict(cur.fetchall())
+    finally:
+        conn.close()
+
+RUNS = load_published_runs(LEAGUE, SEASON)
+
+def run_of(page: str) -> int:
+    return RUNS.get(page, -1) # -1 : rien de publié, les requêtes renvoient un tableau vide
+
 # NAVIGATION
 
 st.title("Ligue 1 — Dashboard")
@@ -60,9 +82,9 @@ page = st.sidebar.radio(
 if page == "Accueil":
     st.subheader("Aperçu Ligue 1")
 
-    standings = load_df(f"SELECT team, points FROM standings WHERE season='{SEASON}' ORDER BY rank LIMIT 1;")
-    scorers = load_df(f"SELECT player_name, goals FROM scorers WHERE season='{SEASON}' ORDER BY goals DESC LIMIT 1;")
-    assists = load_df(f"SELECT player_name, assists FROM assists WHERE season='{SEASON}' ORDER BY assists DESC LIMIT 1;")
+    standings = load_df(f"SELECT t.name AS team, s.points FROM standings s JOIN teams t ON t.id = s.team_id WHERE s.run_id={run_of('standings')} AND s.league='{LEAGUE}' AND s.season='{SEASON}' ORDER BY s.rank LIMIT 1;")
+    scorers = load_df(f"SELECT p.name AS player_name, s.goals FROM scorers s JOIN players p ON p.id = s.player_id WHERE s.run_id={run_of('scorers')} AND s.league='{LEAGUE}' AND s.season='{SEASON}' ORDER BY s.goals DESC LIMIT 1;")
+    assists = load_df(f"SELECT p.name AS player_name, a.assists FROM assists a JOIN players p ON p.id = a.player_id WHERE a.run_id={run_of('assists')} AND a.league='{LEAGUE}' AND a.season='{SEASON}' ORDER BY a.assists DESC LIMIT 1;")
 
     k1, k2, k3 = st.columns(3)
     if not standings.empty:
@@ -78,16 +100,18 @@ elif page == "Classement":
     st.subheader(f"Classement Ligue 1 - Saison {SEASON}")
     df = load_df(f"""
         SELECT 
-            rank AS "Rang", 
-            logo_url AS " ", 
-            team AS "Équipe", 
-            played AS "J", 
-            wins AS "G", 
-            draws AS "N", 
-            losses AS "P", 
-            goal_diff AS "Diff", 
-            points AS "Pts"
-        FROM standings WHERE season='{SEASON}' ORDER BY rank ASC;
+            s.rank AS "Rang", 
+            s.logo_url AS " ", 
+            t.name AS "Équipe", 
+            s.played AS "J", 
+            s.wins AS "G", 
+            s.draws AS "N", 
+            s.losses AS "P", 
+            s.goal_diff AS "Diff", 
+            s.points AS "Pts"
+        FROM standings s
+        JOIN teams t ON t.id = s.team_id
+        WHERE s.run_id={run_of('standings')} AND s.league='{LEAGUE}' AND s.season='{SEASON}' ORDER BY s.rank ASC;
     """)
     st.dataframe(df, column_config={
         " ": st.column_config.ImageColumn(" ", width="small"),
@@ -127,12 +151,14 @@ elif page == "Buteurs":
     st.subheader("Classement des Buteurs")
     df = load_df(f"""
         SELECT 
-            photo_url AS " ", 
-            player_name AS "Joueur", 
-            logo_url AS "Club", 
-            goals AS "Buts", 
-            penalties AS "Penaltys"
-        FROM scorers WHERE season='{SEASON}' ORDER BY goals DESC, rank ASC;
+            p.photo_url AS " ", 
+            p.name AS "Joueur", 
+            s.logo_url AS "Club", 
+            s.goals AS "Buts", 
+            s.penalties AS "Penaltys"
+        FROM scorers s
+        JOIN players p ON p.id = s.player_id
+        WHERE s.run_id={run_of('scorers')} AND s.league='{LEAGUE}' AND s.season='{SEASON}' ORDER BY s.goals DESC, s.rank ASC;
     """)
     q = st.text_input("Rechercher un buteur")
     if q: df = df[df["Joueur"].str.contains(q, case=False)]
@@ -148,11 +174,13 @@ elif page == "Passeurs":
     st.subheader("Classement des Passeurs")
     df = load_df(f"""
         SELECT 
-            photo_url AS " ", 
-            player_name AS "Joueur", 
-            logo_url AS "Club", 
-            assists AS "Passes"
-        FROM assists WHERE season='{SEASON}' ORDER BY assists DESC, rank ASC;
+            p.photo_url AS " ", 
+            p.name AS "Joueur", 
+            a.logo_url AS "Club", 
+            a.assists AS "Passes"
+        FROM assists a
+        JOIN players p ON p.id = a.player_id
+        WHERE a.run_id={run_of('assists')} AND a.league='{LEAGUE}' AND a.season='{SEASON}' ORDER BY a.assists DESC, a.rank ASC;
     """)
     q = st.text_input("Rechercher un joueur")
     if q: df = df[df["Joueur"].str.contains(q, case=False)]
@@ -168,28 +196,31 @@ elif page == "Contributions":
     st.subheader("Contributions Combinées (Buts + Passes)")
     df = load_df(f"""
         SELECT 
-            photo_url AS " ",
-            player_name AS "Joueur", 
-            logo_url AS "Équipe",
+            p.photo_url AS " ",
+            p.name AS "Joueur", 
+            COALESCE(MAX(t.logo_url), MAX(combined.logo_url)) AS "Équipe",
             SUM(goals) AS "Buts", 
             SUM(assists) AS "Passes",
             (SUM(goals) + SUM(assists)) AS "Total"
         FROM (
             SELECT 
-                player_name, 
+                player_id, 
+                team_id, 
                 goals, 
                 0 AS assists, 
-                photo_url, 
-                logo_url FROM scorers WHERE season='{SEASON}'
+                logo_url FROM scorers WHERE run_id={run_of('scorers')} AND league='{LEAGUE}' AND season='{SEASON}'
                 UNION ALL
             SELECT 
-                player_name, 
+                player_id, 
+                team_id, 
                 0 AS goals, 
                 assists, 
-                photo_url, 
-                logo_url FROM assists WHERE season='{SEASON}'
+                logo_url FROM assists WHERE run_id={run_of('assists')} AND league='{LEAGUE}' AND season='{SEASON}'
         ) AS combined
-        GROUP BY player_name, photo_url, logo_url
+        JOIN players p ON p.id = combined.player_id
+        LEFT JOIN teams t ON t.id = combined.team_id
+        -- regroupement sur les identifiants entiers (et non plus sur nom + URLs d'images)
+        GROUP BY p.id
         ORDER BY "Total" DESC;
     """)
     
@@ -208,22 +239,23 @@ elif page == "Palmarès":
     st.subheader("Palmarès Ligue 1")
     # Deux vues : (1) clubs les plus titrés, (2) historique saison par saison
 
-    clubs = load_df("""
+    clubs = load_df(f"""
         SELECT 
             logo_url AS "Logo", 
             team AS "Equipe", titles AS "Titres" 
         FROM palmares_clubs 
-        WHERE titles < 30 
+        WHERE run_id={run_of('palmares')} AND titles < 30 
         ORDER BY titles DESC;
     """)
 
-    history = load_df("""
+    history = load_df(f"""
         SELECT season AS "Saison", 
                winner_logo AS " ", 
                 winner AS "Vainqueurs", 
                runner_up_logo AS "  ", 
                 runner_up AS "Dauphins"
         FROM palmares_history 
+        WHERE run_id={run_of('palmares')}
         ORDER BY season DESC;
     """)
 
@@ -0,0 +1,340 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import streamlit as st
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from tornado.websocket import websocket_connect
+
+from scraper.db import get_conn
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "app.py")
+PAGES = ["Accueil", "Classement", "Buteurs", "Passeurs", "Contributions", "Palmarès"]
+# Fin de script sans erreur (run complet ou fragment)
+SCRIPT_OK = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+
+
+def percentile(values, p):
+    """Percentile au rang le plus proche (pas d'interpolation : le résultat est une mesure réelle)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": max(values) if values else None,
+        "mean_ms": sum(values) / len(values) if values else None,
+    }
+
+
+def db_transactions():
+    """Compteur de transactions de la base (pg_stat_database) : chaque load_df ouvre sa propre connexion."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = current_database();"
+            )
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def start_server(port: int, timeout: float = 60):
+    """Lance un vrai serveur `streamlit run app/app.py` et attend qu'il réponde."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"le serveur Streamlit s'est arrêté (code {proc.returncode})")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"le serveur Streamlit ne répond pas après {timeout:.0f}s")
+
+
+class MemorySampler(threading.Thread):
+    """Relève la mémoire résidente du processus serveur Streamlit (Linux : /proc/<pid>/statm)."""
+
+    def __init__(self, pid: int | None, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._done = threading.Event()
+
+    def rss_mb(self):
+        try:
+            with open(f"/proc/{self.pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+        except (OSError, ValueError):
+            return None
+
+    def run(self):
+        if self.pid is None:
+            return
+        while not self._done.is_set():
+            rss = self.rss_mb()
+            if rss is not None:
+                self.samples.append(rss)
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class Session:
+    """
+    Un visiteur : une connexion websocket au serveur, comme l'onglet d'un navigateur.
+    Un rendu = un rerun du script envoyé au serveur, mesuré jusqu'au message script_finished.
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.ws_url = url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+        self.timeout = timeout
+        self.ws = None
+        self.nav_id = None
+
+    async def open(self):
+        self.close()
+        self.ws = await websocket_connect(self.ws_url, subprotocols=["streamlit"], max_message_size=200 * 1024 ** 2)
+        # Premier rendu (non mesuré) : on y récupère l'identifiant du menu de navigation
+        await self.render()
+
+    def close(self):
+        if self.ws:
+            self.ws.close()
+        self.ws = None
+
+    def send(self, msg: BackMsg):
+        self.ws.write_message(msg.SerializeToString(), binary=True)
+
+    async def render(self, page: str | None = None, clear_cache: bool = False):
+        """Renvoie None si le rendu a réussi, sinon le message d'erreur. Lève asyncio.TimeoutError."""
+        if clear_cache:
+            # Vide st.cache_data côté serveur (cache load_df expiré)
+            self.send(BackMsg(clear_cache=True))
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        if page is not None:
+            states = WidgetStates()
+            widget = states.widgets.add()
+            widget.id = self.nav_id
+            widget.int_value = PAGES.index(page)
+            msg.rerun_script.widget_states.CopyFrom(states)
+        self.send(msg)
+        return await asyncio.wait_for(self._read_until_finished(), self.timeout)
+
+    async def _read_until_finished(self):
+        error = None
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("connexion fermée par le serveur")
+            fm = ForwardMsg()
+            fm.ParseFromString(raw)
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                element = fm.delta.new_element
+                if element.WhichOneof("type") == "radio" and list(element.radio.options) == PAGES:
+                    self.nav_id = element.radio.id
+                elif element.WhichOneof("type") == "exception":
+                    error = f"{element.exception.type}: {element.exception.message}"
+            elif kind == "script_finished":
+                if fm.script_finished not in SCRIPT_OK:
+                    error = error or f"script_finished={fm.script_finished}"
+                return error
+
+
+async def simulate_session(session: Session, rounds: int, cold_cache: bool, stats: dict):
+    """Parcourt toutes les pages `rounds` fois. Une erreur ou un timeout est compté et la session continue."""
+    for _ in range(rounds):
+        for page in PAGES:
+            started = time.perf_counter()
+            try:
+                if session.ws is None:
+                    # Après un timeout : le visiteur recharge l'onglet (non mesuré)
+                    await session.open()
+                    started = time.perf_counter()
+                error = await session.render(page, clear_cache=cold_cache)
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+                error = None
+                session.close()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                session.close()
+            stats["timings"][page].append((time.perf_counter() - started) * 1000)
+            if error:
+                stats["errors"] += 1
+                stats["first_error"] = stats["first_error"] or error
+    session.close()
+
+
+async def drive_sessions(url, sessions, rounds, cold_cache, timeout):
+    clients = [Session(url, timeout) for _ in range(sessions)]
+    # Toutes les sessions sont ouvertes (premier rendu fait) avant de démarrer la mesure ensemble
+    await asyncio.gather(*(c.open() for c in clients))
+    stats = {"timings": {page: [] for page in PAGES}, "errors": 0, "timeouts": 0, "first_error": None}
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate_session(c, rounds, cold_cache, stats) for c in clients))
+    return stats, time.perf_counter() - started
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(url, server_pid, sessions, rounds, cold_cache=False, timeout=60):
+    sampler = MemorySampler(server_pid)
+    # Les compteurs de pg_stat sont publiés avec un léger décalage : on laisse passer 1 s avant chaque relevé
+    time.sleep(1)
+    tx_before = db_transactions()
+    sampler.start()
+
+    stats, duration = asyncio.run(drive_sessions(url, sessions, rounds, cold_cache, timeout))
+
+    sampler.stop()
+    time.sleep(1)
+    # -1 : la requête de relevé elle-même
+    tx = db_transactions() - tx_before - 1
+
+    per_page = stats["timings"]
+    all_values = [v for values in per_page.values() for v in values]
+    return {
+        "duration_s": duration,
+        "renders": len(all_values),
+        "errors": stats["errors"],
+        "timeouts": stats["timeouts"],
+        "first_error": stats["first_error"],
+        "renders_per_s": len(all_values) / duration,
+        "latency": {"all": summarize(all_values), **{page: summarize(v) for page, v in per_page.items()}},
+        "db": {"transactions": tx, "transactions_per_s": tx / duration},
+        "memory_mb": {
+            "start": sampler.samples[0] if sampler.samples else None,
+            "peak": max(sampler.samples) if sampler.samples else None,
+            "end": sampler.samples[-1] if sampler.samples else None,
+        },
+    }
+
+
+def fmt_ms(value):
+    return f"{value:>10.0f}" if value is not None else f"{'-':>10}"
+
+
+def print_report(report):
+    r = report["results"]
+    if not r["renders"]:
+        print("Aucun rendu mesuré.")
+        return
+    print(f"\n{report['config']['sessions']} sessions x {report['config']['rounds']} tours "
+          f"({'cache froid' if report['config']['cold_cache'] else 'cache chaud'}) : "
+          f"{r['renders']} rendus en {r['duration_s']:.1f}s, {r['errors']} erreurs, {r['timeouts']} timeouts")
+    print(f"{'page':<15}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for page, s in r["latency"].items():
+        # Une page sans mesure (toutes ses sessions ont échoué avant) n'a pas de percentiles
+        print(f"{page:<15}{fmt_ms(s['p50_ms'])}{fmt_ms(s['p95_ms'])}{fmt_ms(s['p99_ms'])}{fmt_ms(s['max_ms'])}")
+    print(f"DB : {r['db']['transactions_per_s']:.1f} transactions/s ({r['db']['transactions']} au total)")
+    m = r["memory_mb"]
+    if m["peak"] is None:
+        print("Mémoire serveur : non mesurée (serveur externe sans --server-pid, ou hors Linux)")
+        return
+    print(f"Mémoire serveur : {m['start']:.0f} Mo au début, pic {m['peak']:.0f} Mo, {m['end']:.0f} Mo à la fin")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du dashboard : N sessions simultanées sur toutes les pages.")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3, help="nombre de parcours complets par session")
+    parser.add_argument("--cold-cache", action="store_true", help="vide le cache load_df avant chaque rendu")
+    parser.add_argument("--seed", type=int, default=None, help="seed utilisée pour loadtest.seed (notée dans le rapport)")
+    parser.add_argument("--timeout", type=int, default=60, help="timeout d'un rendu (s)")
+    parser.add_argument("--output", default=None, help="fichier JSON (défaut: loadtest/reports/<date>.json)")
+    parser.add_argument("--port", type=int, default=8599, help="port du serveur Streamlit lancé pour le test")
+    parser.add_argument("--url", default=None, help="serveur déjà lancé (ex: http://localhost:8501) au lieu d'en lancer un")
+    parser.add_argument("--server-pid", type=int, default=None, help="pid du serveur passé par --url (mesure mémoire)")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url, server_pid = args.url, args.server_pid
+    else:
+        server = start_server(args.port)
+        url, server_pid = f"http://localhost:{args.port}", server.pid
+    try:
+        results = run_load_test(url, server_pid, args.sessions, args.rounds,
+                                cold_cache=args.cold_cache, timeout=args.timeout)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    # Aucun rendu réussi : le dashboard (ou la base) est cassé, les latences ne veulent rien dire
+    if results["renders"] and results["errors"] + results["timeouts"] == results["renders"]:
+        raise SystemExit(f"Tous les rendus ont échoué ({results['errors']} erreurs, {results['timeouts']} timeouts). "
+                         f"Première erreur : {results['first_error']}")
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "sessions": args.sessions,
+            "rounds": args.rounds,
+            "cold_cache": args.cold_cache,
+            "seed": args.seed,
+            "pages": PAGES,
+            "league": os.environ.get("LEAGUE", "ligue-1"),
+            "season": os.environ.get("SEASON", "2025/2026"),
+            "server": args.url or "streamlit run app/app.py",
+        },
+        "environment": {
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "streamlit": st.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        "loadtest", "reports", datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_report(report)
+    print(f"\nRapport : {output}")
+
+
+if __name__ == "__main__":
+    main()
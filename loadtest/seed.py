@@ -0,0 +1,120 @@
+import argparse
+import random
+
+from scraper.archive import new_run_label
+from scraper.config import CURRENT_SEASON, DEFAULT_LEAGUE
+from scraper.db import ALL_SEASONS, ensure_schema
+from scraper.standings import upsert_standings
+from scraper.scorers import upsert_scorers
+from scraper.assists import upsert_assists
+from scraper.palmares import save_db
+from scraper.runs import publish, start_run
+
+# Données synthétiques mais de forme réaliste, passées par les mêmes upserts que les scrapers.
+# Même seed = même base : les rapports de charge restent comparables d'une fois sur l'autre.
+
+FIRST_NAMES = ["Lucas", "Hugo", "Nathan", "Enzo", "Ousmane", "Kylian", "Jonathan", "Rayan", "Moussa", "Théo",
+               "Bradley", "Amine", "Mattéo", "Désiré", "Khvicha", "Alexandre", "Wesley", "Youssouf"]
+LAST_NAMES = ["Martin", "Bernard", "Diallo", "Traoré", "Lefèvre", "Mendy", "Koné", "Girard", "Camara", "Fofana",
+              "Barcola", "Lacazette", "Kolo", "Hernández", "Doué", "Sangaré", "Gouiri", "Thauvin"]
+CITIES = ["Paris", "Marseille", "Lyon", "Monaco", "Lille", "Nice", "Lens", "Rennes", "Strasbourg", "Nantes",
+          "Brest", "Toulouse", "Reims", "Auxerre", "Angers", "Le Havre", "Lorient", "Metz"]
+
+
+def fake_logo(i: int) -> str:
+    return f"https://example.invalid/logos/{i}.png"
+
+
+def fake_photo(i: int) -> str:
+    return f"https://example.invalid/players/{i}.jpg"
+
+
+def make_standings(rng, league, season):
+    rows = []
+    teams = rng.sample(CITIES, len(CITIES))
+    for rank, city in enumerate(teams, start=1):
+        played = 20
+        wins = rng.randint(2, 15)
+        draws = rng.randint(0, played - wins)
+        losses = played - wins - draws
+        gf, ga = rng.randint(10, 50), rng.randint(10, 45)
+        rows.append({
+            "league": league, "season": season, "rank": rank, "team": f"FC {city}",
+            "played": played, "wins": wins, "draws": draws, "losses": losses,
+            "goals_for": gf, "goals_against": ga, "goal_diff": gf - ga, "points": 3 * wins + draws,
+            "logo_url": fake_logo(CITIES.index(city)),
+        })
+    return rows
+
+
+def make_players(rng, n):
+    names = set()
+    while len(names) < n:
+        names.add(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.randint(1, 999)}")
+    return sorted(names)
+
+
+def make_scorers(rng, players, league, season):
+    rows = []
+    for rank, (i, name) in enumerate(enumerate(players), start=1):
+        rows.append({
+            "league": league, "season": season, "rank": rank, "player_name": name, "team": None,
+            "goals": rng.randint(0, 20), "penalties": rng.randint(0, 4),
+            "photo_url": fake_photo(i), "logo_url": fake_logo(rng.randrange(len(CITIES))),
+        })
+    return rows
+
+
+def make_assists(rng, players, league, season):
+    rows = []
+    for rank, (i, name) in enumerate(enumerate(players), start=1):
+        rows.append({
+            "league": league, "season": season, "rank": rank, "player_name": name, "team": None,
+            "assists": rng.randint(0, 12),
+            "photo_url": fake_photo(i), "logo_url": fake_logo(rng.randrange(len(CITIES))),
+        })
+    return rows
+
+
+def make_palmares(rng):
+    clubs = [(f"FC {city}", rng.randint(1, 12), fake_logo(i)) for i, city in enumerate(CITIES)]
+    history = [
+        (f"{y}/{y + 1}", f"FC {rng.choice(CITIES)}", None, f"FC {rng.choice(CITIES)}", None)
+        for y in range(1932, 2025)
+    ]
+    return clubs, history
+
+
+def seed(seed: int = 42, players: int = 300, league: str = DEFAULT_LEAGUE, season: str = CURRENT_SEASON):
+    rng = random.Random(seed)
+    ensure_schema()
+    run_id = start_run(f"loadtest-{seed}-{new_run_label()}")
+
+    names = make_players(rng, players)
+    upsert_standings(make_standings(rng, league, season), run_id)
+    upsert_scorers(make_scorers(rng, names, league, season), run_id)
+    upsert_assists(make_assists(rng, names, league, season), run_id)
+    clubs, history = make_palmares(rng)
+    save_db(clubs, history, run_id)
+
+    publish(run_id, [
+        (league, season, "standings"),
+        (league, season, "scorers"),
+        (league, season, "assists"),
+        ("ligue-1", ALL_SEASONS, "palmares"),
+    ])
+    print(f"Base de test remplie (seed={seed}, {players} joueurs, run {run_id}).")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remplit une base locale avec des données synthétiques reproductibles.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--league", default=DEFAULT_LEAGUE)
+    parser.add_argument("--season", default=CURRENT_SEASON)
+    args = parser.parse_args(argv)
+    seed(args.seed, args.players, args.league, args.season)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import gzip
+import hashlib
+import os
+import uuid
+from datetime import datetime, timezone
+
+from scraper.db import get_conn
+
+# Pages HTML brutes, compressées et rangées par empreinte sha256 : data/archive/ab/abcdef....html.gz
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", os.path.join("data", "archive"))
+
+
+def new_run_label() -> str:
+    """Identifiant lisible d'un passage de scraping, ex: 20261019T101500-3f2a9c."""
+    now = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return f"{now}-{uuid.uuid4().hex[:6]}"
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(ARCHIVE_DIR, sha256[:2], f"{sha256}.html.gz")
+
+
+def write_blob(html: str) -> str:
+    """Ecrit le HTML compressé s'il n'est pas déjà archivé (même contenu = même fichier). Retourne le sha256."""
+    data = html.encode("utf-8")
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = blob_path(sha256)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Ecriture dans un fichier temporaire puis renommage : jamais de fichier à moitié écrit
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with gzip.open(tmp, "wb", compresslevel=9) as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return sha256
+
+
+def read_blob(sha256: str) -> str:
+    with gzip.open(blob_path(sha256), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def archive_page(html: str, url: str, page: str, league: str | None = None,
+                 season: str | None = None, run_label: str | None = None) -> str:
+    """Archive une page récupérée et enregistre ses métadonnées dans page_archive."""
+    sha256 = write_blob(html)
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO page_archive (run_label, league, season, page, url, sha256, size_bytes)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s);
+                """, (run_label, league, season, page, url, sha256, len(html.encode("utf-8"))))
+    finally:
+        conn.close()
+    return sha256
@@ -3,12 +3,11 @@ import unicodedata
 from psycopg2.extras import execute_values
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from scraper.db import get_conn
+from scraper.config import BASE, CURRENT_SEASON, DEFAULT_LEAGUE, PAGES, build_url
+from scraper.db import ensure_schema, get_conn
+from scraper.dims import name_key, player_ids, team_ids_by_logo
 from scraper.fetch import fetch_rendered_html
-
-URL = "https://www.footmercato.net/france/ligue-1/passeur"
-SEASON = "2025/2026"
-BASE = "https://www.footmercato.net"
+from scraper.runs import publish, start_run
 
 def clean_player_name(raw_name):
     """
@@ -30,7 +29,7 @@ def clean_player_name(raw_name):
         
     return " ".join(parts).strip()
 
-def parse_assists(html: str):
+def parse_assists(html: str, season: str = CURRENT_SEASON, league: str = DEFAULT_LEAGUE):
     soup = BeautifulSoup(html, "html.parser")
     table = soup.find("table")
     if not table:
@@ -75,7 +74,8 @@ def parse_assists(html: str):
 
         if player_name:
             rows.append({
-                "season": SEASON,
+                "league": league,
+                "season": season,
                 "rank": rank,
                 "player_name": player_name,
                 "team": None,
@@ -85,37 +85,48 @@ def parse_assists(html: str):
             })
     return rows
 
-def upsert_assists(rows):
+def upsert_assists(rows, run_id: int):
     conn = get_conn()
     sql = """
-    INSERT INTO assists (season, rank, player_name, team, assists, photo_url, logo_url)
+    INSERT INTO assists (run_id, league, season, rank, player_name, team, player_id, team_id, assists, photo_url, logo_url)
     VALUES %s
-    ON CONFLICT (season, player_name)
+    ON CONFLICT (run_id, league, season, player_id)
     DO UPDATE SET
       rank = EXCLUDED.rank,
+      player_name = EXCLUDED.player_name,
+      team_id = EXCLUDED.team_id,
       team = EXCLUDED.team,
       assists = EXCLUDED.assists,
       photo_url = EXCLUDED.photo_url,
       logo_url = EXCLUDED.logo_url,
       scraped_at = CURRENT_TIMESTAMP;
     """
-    values = [(r["season"], r["rank"], r["player_name"], r["team"], 
-               r["assists"], r["photo_url"], r["logo_url"]) for r in rows]
 
     try:
         with conn:
             with conn.cursor() as cur:
-                # Ajout des colonnes si besoin
-                cur.execute("ALTER TABLE assists ADD COLUMN IF NOT EXISTS photo_url TEXT;")
-                cur.execute("ALTER TABLE assists ADD COLUMN IF NOT EXISTS logo_url TEXT;")
-                execute_values(cur, sql, values)
+                pids = player_ids(cur, [(r["player_name"], r["photo_url"]) for r in rows])
+                tids = team_ids_by_logo(cur, [r["logo_url"] for r in rows])
+                # Une ligne par joueur, même si deux orthographes du nom se normalisent pareil
+                values = {}
+                for r in rows:
+                    pid = pids[name_key(r["player_name"])]
+                    values.setdefault((r["league"], r["season"], pid), (
+                        run_id, r["league"], r["season"], r["rank"], r["player_name"], r["team"], pid,
+                        tids.get(r["logo_url"]), r["assists"], r["photo_url"], r["logo_url"]
+                    ))
+                execute_values(cur, sql, list(values.values()))
     finally:
         conn.close()
 
-def main():
-    html = fetch_rendered_html(URL, wait_text="Passeurs") # évite de parser trop tôt si la page n'a pas fini de charger
-    rows = parse_assists(html)
-    upsert_assists(rows)
+def main(league: str = DEFAULT_LEAGUE, season: str = CURRENT_SEASON):
+    ensure_schema()
+    # wait_text évite de parser trop tôt si la page n'a pas fini de charger
+    html = fetch_rendered_html(build_url(league, season, "assists"), wait_text=PAGES["assists"]["wait_text"])
+    rows = parse_assists(html, season=season, league=league)
+    run_id = start_run()
+    upsert_assists(rows, run_id)
+    publish(run_id, [(league, season, "assists")])
     print(f"OK: {len(rows)} passeurs mis à jour (noms nettoyés).")
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import argparse
+import time
+
+from scraper.config import DEFAULT_LEAGUE, LEAGUES, PAGES, expand_targets, seasons_between
+from scraper.db import ensure_schema, get_conn
+from scraper.engine import MAX_CONCURRENCY, run
+from scraper.runs import finish_run, publish_pages, start_run
+
+
+def completed_units():
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT league, season, page FROM backfill_progress WHERE status = 'done';")
+            return set(cur.fetchall())
+    finally:
+        conn.close()
+
+
+def checkpoint(conn, target, rows, error, run_id, pages):
+    """
+    Enregistre la page terminée. Quand toutes les pages de sa saison sont faites (éventuellement
+    sur plusieurs runs après une reprise), la saison est publiée dans la même transaction.
+    """
+    status = "failed" if error else "done"
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO backfill_progress (league, season, page, status, rows, error, run_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (league, season, page)
+                DO UPDATE SET
+                  status = EXCLUDED.status,
+                  rows = EXCLUDED.rows,
+                  error = EXCLUDED.error,
+                  run_id = EXCLUDED.run_id,
+                  updated_at = CURRENT_TIMESTAMP;
+            """, (target.league, target.season, target.page, status, rows, str(error) if error else None, run_id))
+            if error:
+                return
+
+            cur.execute("""
+                SELECT page, run_id FROM backfill_progress
+                WHERE league = %s AND season = %s AND page = ANY(%s) AND status = 'done';
+            """, (target.league, target.season, pages))
+            finished = cur.fetchall()
+            if len(finished) == len(pages):
+                publish_pages(cur, [(target.league, target.season, page, rid) for page, rid in finished])
+
+
+def backfill(leagues, first_season, last_season, pages=None, workers=MAX_CONCURRENCY, restart=False):
+    """
+    Charge l'historique page par page. Chaque page terminée est enregistrée dans backfill_progress :
+    relancer la même commande reprend là où elle s'était arrêtée (sauf restart=True).
+    """
+    ensure_schema()
+    targets = expand_targets(leagues, seasons_between(first_season, last_season), pages)
+    already_done = set() if restart else completed_units()
+    queue = [t for t in targets if tuple(t) not in already_done]
+
+    print(f"Backfill : {len(targets)} pages au total, {len(targets) - len(queue)} déjà faites, "
+          f"{len(queue)} à traiter ({workers} en parallèle).")
+    if not queue:
+        return [], []
+
+    pages = pages or list(PAGES)
+    run_id = start_run()
+    conn = get_conn()
+    started = time.monotonic()
+    processed = errors = 0
+
+    def on_result(target, rows, error):
+        nonlocal processed, errors
+        checkpoint(conn, target, rows, error, run_id, pages)
+        processed += 1
+        errors += bool(error)
+        minutes = max(time.monotonic() - started, 1e-6) / 60
+        print(f"  {processed}/{len(queue)} pages, {processed / minutes:.1f} pages/min")
+
+    try:
+        done, failed = run(queue, max_workers=workers, on_result=on_result, run_id=run_id)
+    finally:
+        conn.close()
+        finish_run(run_id, "published" if processed > errors else "failed")
+
+    minutes = max(time.monotonic() - started, 1e-6) / 60
+    print(f"Backfill terminé : {len(done)} OK, {len(failed)} en échec en {minutes:.1f} min "
+          f"({len(done) / minutes:.1f} pages/min).")
+    return done, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill reprenable des saisons passées.")
+    parser.add_argument("--from", dest="first", required=True, help="première saison, ex: 2014/2015")
+    parser.add_argument("--to", dest="last", required=True, help="dernière saison, ex: 2024/2025")
+    parser.add_argument("--league", action="append", choices=sorted(LEAGUES), help=f"répétable (défaut: {DEFAULT_LEAGUE})")
+    parser.add_argument("--page", action="append", choices=sorted(PAGES), help="répétable (défaut: toutes)")
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--restart", action="store_true", help="ignore la progression enregistrée")
+    args = parser.parse_args(argv)
+
+    _, failed = backfill(args.league or [DEFAULT_LEAGUE], args.first, args.last,
+                         pages=args.page, workers=args.workers, restart=args.restart)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
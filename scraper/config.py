@@ -0,0 +1,83 @@
+import os
+from collections import namedtuple
+
+BASE = "https://www.footmercato.net"
+
+# Championnats suivis : slug interne -> chemin sur Foot Mercato
+LEAGUES = {
+    "ligue-1": "france/ligue-1",
+    "ligue-2": "france/ligue-2",
+    "premier-league": "angleterre/premier-league",
+    "liga": "espagne/liga",
+    "serie-a": "italie/serie-a",
+    "bundesliga": "allemagne/bundesliga",
+}
+
+# Types de page saisonniers : chemin + texte attendu avant de récupérer le HTML
+PAGES = {
+    "standings": {"path": "classement", "wait_text": None},
+    "scorers": {"path": "buteur", "wait_text": "Buteurs"},
+    "assists": {"path": "passeur", "wait_text": "Passeurs"},
+}
+
+# La saison en cours n'a pas de suffixe dans l'URL, les saisons passées si (ex: .../classement/2023-2024)
+URL_TEMPLATE = "{base}/{league_path}/{page_path}"
+SEASON_URL_TEMPLATE = "{base}/{league_path}/{page_path}/{season_slug}"
+
+DEFAULT_LEAGUE = os.environ.get("LEAGUE", "ligue-1")
+CURRENT_SEASON = os.environ.get("SEASON", "2025/2026")
+
+Target = namedtuple("Target", ["league", "season", "page"])
+
+
+def season_slug(season: str) -> str:
+    """ "2023/2024" -> "2023-2024" """
+    return season.replace("/", "-")
+
+
+def seasons_between(first: str, last: str):
+    """ "2015/2016", "2017/2018" -> ["2015/2016", "2016/2017", "2017/2018"] """
+    start, end = int(first.split("/")[0]), int(last.split("/")[0])
+    if start > end:
+        start, end = end, start
+    return [f"{y}/{y + 1}" for y in range(start, end + 1)]
+
+
+def build_url(league: str, season: str, page: str) -> str:
+    if league not in LEAGUES:
+        raise ValueError(f"Championnat inconnu : {league}")
+    if page not in PAGES:
+        raise ValueError(f"Type de page inconnu : {page}")
+
+    template = URL_TEMPLATE if season == CURRENT_SEASON else SEASON_URL_TEMPLATE
+    return template.format(
+        base=BASE,
+        league_path=LEAGUES[league],
+        page_path=PAGES[page]["path"],
+        season_slug=season_slug(season),
+    )
+
+
+def expand_targets(leagues, seasons, pages=None):
+    """Produit cartésien (championnat, saison, type de page) -> liste de Target."""
+    pages = pages or list(PAGES)
+    return [Target(l, s, p) for l in leagues for s in seasons for p in pages]
+
+
+def targets_from_env():
+    """
+    Lit SCRAPE_TARGETS, ex: "ligue-1:2025/2026,premier-league:2025/2026".
+    Sans variable, on ne scrape que le championnat et la saison par défaut.
+    """
+    raw = os.environ.get("SCRAPE_TARGETS", "").strip()
+    if not raw:
+        return expand_targets([DEFAULT_LEAGUE], [CURRENT_SEASON])
+
+    targets = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        league, _, season = item.partition(":")
+        targets += expand_targets([league.strip()], [season.strip() or CURRENT_SEASON])
+    return targets
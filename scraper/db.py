@@ -1,9 +1,17 @@
 import os
 import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
+from scraper.dims import backfill_ids
 
 load_dotenv()
 
+# Pages sans saison (palmarès) : publiées sous cette "saison"
+ALL_SEASONS = "*"
+
+# Tables versionnées par run : les lignes d'un run restent invisibles tant que le run n'est pas publié
+RUN_TABLES = ["standings", "scorers", "assists", "palmares_clubs", "palmares_history"]
+
 def get_conn():
     return psycopg2.connect(
         dbname=os.environ["POSTGRES_DB"],
@@ -12,3 +20,217 @@ def get_conn():
         host=os.environ.get("POSTGRES_HOST", "localhost"),
         port=int(os.environ.get("POSTGRES_PORT", "5432")),
     )
+
+
+# A incrémenter à chaque modification de MIGRATIONS / POST_MIGRATIONS
+SCHEMA_VERSION = 2
+# Clé du verrou consultatif pris pendant les migrations
+SCHEMA_LOCK_ID = 726001
+_schema_ready = False
+
+# Mise à niveau des bases créées avant l'ajout des colonnes (schema.sql n'est joué qu'à la création du volume)
+MIGRATIONS = [
+    """CREATE TABLE IF NOT EXISTS schema_version (
+      version INT NOT NULL,
+      applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );""",
+    "ALTER TABLE scorers ADD COLUMN IF NOT EXISTS photo_url TEXT;",
+    "ALTER TABLE scorers ADD COLUMN IF NOT EXISTS logo_url TEXT;",
+    "ALTER TABLE assists ADD COLUMN IF NOT EXISTS photo_url TEXT;",
+    "ALTER TABLE assists ADD COLUMN IF NOT EXISTS logo_url TEXT;",
+
+    # Multi-championnats : la clé unique inclut maintenant le championnat
+    "ALTER TABLE standings ADD COLUMN IF NOT EXISTS league VARCHAR(50) NOT NULL DEFAULT 'ligue-1';",
+    "ALTER TABLE scorers ADD COLUMN IF NOT EXISTS league VARCHAR(50) NOT NULL DEFAULT 'ligue-1';",
+    "ALTER TABLE assists ADD COLUMN IF NOT EXISTS league VARCHAR(50) NOT NULL DEFAULT 'ligue-1';",
+    "ALTER TABLE standings DROP CONSTRAINT IF EXISTS standings_season_team_key;",
+    "ALTER TABLE scorers DROP CONSTRAINT IF EXISTS scorers_season_player_name_key;",
+    "ALTER TABLE assists DROP CONSTRAINT IF EXISTS assists_season_player_name_key;",
+
+    # Suivi du backfill historique (reprise après interruption)
+    """CREATE TABLE IF NOT EXISTS backfill_progress (
+      league VARCHAR(50) NOT NULL,
+      season VARCHAR(20) NOT NULL,
+      page VARCHAR(20) NOT NULL,
+      status VARCHAR(10) NOT NULL,
+      rows INT,
+      error TEXT,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (league, season, page)
+    );""",
+
+    # Archive des pages HTML brutes (les fichiers sont dans ARCHIVE_DIR, ici seulement les métadonnées)
+    """CREATE TABLE IF NOT EXISTS page_archive (
+      id SERIAL PRIMARY KEY,
+      run_label VARCHAR(40),
+      league VARCHAR(50),
+      season VARCHAR(20),
+      page VARCHAR(20) NOT NULL,
+      url TEXT NOT NULL,
+      sha256 CHAR(64) NOT NULL,
+      size_bytes INT,
+      fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );""",
+    # page_archive.run_id contenait le label du run (texte) : renommé pour ne pas le confondre avec scrape_runs.id
+    """DO $$ BEGIN
+      IF EXISTS (SELECT 1 FROM information_schema.columns
+                 WHERE table_name = 'page_archive' AND column_name = 'run_id') THEN
+        ALTER TABLE page_archive RENAME COLUMN run_id TO run_label;
+      END IF;
+    END $$;""",
+    "CREATE INDEX IF NOT EXISTS page_archive_target_idx ON page_archive (league, season, page, fetched_at);",
+
+    # Dimensions joueurs / équipes (clé = nom normalisé, sans accents ni casse)
+    """CREATE TABLE IF NOT EXISTS teams (
+      id SERIAL PRIMARY KEY,
+      key VARCHAR(120) NOT NULL UNIQUE,
+      name VARCHAR(120) NOT NULL,
+      logo_url TEXT
+    );""",
+    """CREATE TABLE IF NOT EXISTS players (
+      id SERIAL PRIMARY KEY,
+      key VARCHAR(120) NOT NULL UNIQUE,
+      name VARCHAR(120) NOT NULL,
+      photo_url TEXT
+    );""",
+    "CREATE INDEX IF NOT EXISTS teams_logo_url_idx ON teams (logo_url);",
+    "ALTER TABLE standings ADD COLUMN IF NOT EXISTS team_id INT REFERENCES teams(id);",
+    "ALTER TABLE scorers ADD COLUMN IF NOT EXISTS player_id INT REFERENCES players(id);",
+    "ALTER TABLE scorers ADD COLUMN IF NOT EXISTS team_id INT REFERENCES teams(id);",
+    "ALTER TABLE assists ADD COLUMN IF NOT EXISTS player_id INT REFERENCES players(id);",
+    "ALTER TABLE assists ADD COLUMN IF NOT EXISTS team_id INT REFERENCES teams(id);",
+
+    # Runs : chaque passage écrit ses propres lignes, published_runs désigne celles que l'on lit
+    """CREATE TABLE IF NOT EXISTS scrape_runs (
+      id SERIAL PRIMARY KEY,
+      label VARCHAR(40) NOT NULL UNIQUE,
+      status VARCHAR(10) NOT NULL,
+      started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      finished_at TIMESTAMP
+    );""",
+    """CREATE TABLE IF NOT EXISTS published_runs (
+      league VARCHAR(50) NOT NULL,
+      season VARCHAR(20) NOT NULL,
+      page VARCHAR(20) NOT NULL,
+      run_id INT NOT NULL REFERENCES scrape_runs(id),
+      published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (league, season, page)
+    );""",
+    "ALTER TABLE standings ADD COLUMN IF NOT EXISTS run_id INT REFERENCES scrape_runs(id);",
+    "ALTER TABLE scorers ADD COLUMN IF NOT EXISTS run_id INT REFERENCES scrape_runs(id);",
+    "ALTER TABLE assists ADD COLUMN IF NOT EXISTS run_id INT REFERENCES scrape_runs(id);",
+    "ALTER TABLE palmares_clubs ADD COLUMN IF NOT EXISTS run_id INT REFERENCES scrape_runs(id);",
+    "ALTER TABLE palmares_history ADD COLUMN IF NOT EXISTS run_id INT REFERENCES scrape_runs(id);",
+    "ALTER TABLE palmares_history ADD COLUMN IF NOT EXISTS winner_logo TEXT;",
+    "ALTER TABLE palmares_history ADD COLUMN IF NOT EXISTS runner_up_logo TEXT;",
+    "ALTER TABLE palmares_clubs ADD COLUMN IF NOT EXISTS logo_url TEXT;",
+    "ALTER TABLE backfill_progress ADD COLUMN IF NOT EXISTS run_id INT;",
+    "ALTER TABLE scrape_runs ADD COLUMN IF NOT EXISTS superseded_at TIMESTAMP;",
+]
+
+# Après backfill_ids et adopt_legacy_rows : les clés uniques passent aux identifiants entiers, par run
+# (mêmes noms que ceux générés par schema.sql pour ne pas doublonner les index sur une base neuve)
+POST_MIGRATIONS = [
+    "ALTER TABLE standings DROP CONSTRAINT IF EXISTS standings_league_season_team_key;",
+    "ALTER TABLE scorers DROP CONSTRAINT IF EXISTS scorers_league_season_player_name_key;",
+    "ALTER TABLE assists DROP CONSTRAINT IF EXISTS assists_league_season_player_name_key;",
+    "DROP INDEX IF EXISTS standings_league_season_team_key;",
+    "DROP INDEX IF EXISTS scorers_league_season_player_name_key;",
+    "DROP INDEX IF EXISTS assists_league_season_player_name_key;",
+    "ALTER TABLE standings DROP CONSTRAINT IF EXISTS standings_league_season_team_id_key;",
+    "ALTER TABLE scorers DROP CONSTRAINT IF EXISTS scorers_league_season_player_id_key;",
+    "ALTER TABLE assists DROP CONSTRAINT IF EXISTS assists_league_season_player_id_key;",
+    "ALTER TABLE palmares_clubs DROP CONSTRAINT IF EXISTS palmares_clubs_team_key;",
+    "ALTER TABLE palmares_history DROP CONSTRAINT IF EXISTS palmares_history_season_key;",
+    "DROP INDEX IF EXISTS standings_league_season_team_id_key;",
+    "DROP INDEX IF EXISTS scorers_league_season_player_id_key;",
+    "DROP INDEX IF EXISTS assists_league_season_player_id_key;",
+    # Deux orthographes du même joueur (accents) deviennent le même player_id : on garde la plus récente
+    """DELETE FROM scorers a USING scorers b
+       WHERE a.run_id = b.run_id AND a.league = b.league AND a.season = b.season
+         AND a.player_id = b.player_id AND a.id < b.id;""",
+    """DELETE FROM assists a USING assists b
+       WHERE a.run_id = b.run_id AND a.league = b.league AND a.season = b.season
+         AND a.player_id = b.player_id AND a.id < b.id;""",
+    """DELETE FROM standings a USING standings b
+       WHERE a.run_id = b.run_id AND a.league = b.league AND a.season = b.season
+         AND a.team_id = b.team_id AND a.id < b.id;""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS standings_run_id_league_season_team_id_key ON standings (run_id, league, season, team_id);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS scorers_run_id_league_season_player_id_key ON scorers (run_id, league, season, player_id);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS assists_run_id_league_season_player_id_key ON assists (run_id, league, season, player_id);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS palmares_clubs_run_id_team_key ON palmares_clubs (run_id, team);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS palmares_history_run_id_season_key ON palmares_history (run_id, season);",
+]
+
+def adopt_legacy_rows(cur):
+    """
+    Les lignes écrites avant le versionnement n'ont pas de run_id : on les rattache à un run
+    "legacy" déjà publié pour que le dashboard continue de les afficher.
+    """
+    legacy = {}
+    for table in RUN_TABLES:
+        cur.execute(f"SELECT 1 FROM {table} WHERE run_id IS NULL LIMIT 1;")
+        if cur.fetchone():
+            if "id" not in legacy:
+                cur.execute("""
+                    INSERT INTO scrape_runs (label, status, finished_at)
+                    VALUES ('legacy', 'published', CURRENT_TIMESTAMP)
+                    ON CONFLICT (label) DO UPDATE SET status = EXCLUDED.status
+                    RETURNING id;
+                """)
+                legacy["id"] = cur.fetchone()[0]
+            cur.execute(f"UPDATE {table} SET run_id = %s WHERE run_id IS NULL;", (legacy["id"],))
+
+    if "id" not in legacy:
+        return
+    cur.execute("""
+        SELECT DISTINCT league, season, 'standings' FROM standings WHERE run_id = %(r)s
+        UNION SELECT DISTINCT league, season, 'scorers' FROM scorers WHERE run_id = %(r)s
+        UNION SELECT DISTINCT league, season, 'assists' FROM assists WHERE run_id = %(r)s;
+    """, {"r": legacy["id"]})
+    pages = [(league, season, page, legacy["id"]) for league, season, page in cur.fetchall()]
+    cur.execute("SELECT 1 FROM palmares_clubs WHERE run_id = %s LIMIT 1;", (legacy["id"],))
+    if cur.fetchone():
+        pages.append(("ligue-1", ALL_SEASONS, "palmares", legacy["id"]))
+    # Ne remplace pas un pointeur déjà publié par un vrai run
+    execute_values(cur, """
+        INSERT INTO published_runs (league, season, page, run_id) VALUES %s
+        ON CONFLICT (league, season, page) DO NOTHING;
+    """, pages)
+
+
+def _schema_version(cur):
+    cur.execute("SELECT to_regclass('schema_version') IS NOT NULL;")
+    if not cur.fetchone()[0]:
+        return 0
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+    return cur.fetchone()[0]
+
+
+def ensure_schema():
+    """
+    A appeler une fois par processus avant d'écrire. Les migrations ne sont jouées que si la base
+    n'est pas encore à SCHEMA_VERSION : sinon une simple lecture, sans verrou sur les tables lues
+    par le dashboard (les ALTER TABLE prennent un verrou exclusif même quand ils ne changent rien).
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                if _schema_version(cur) < SCHEMA_VERSION:
+                    # Deux scrapers lancés en même temps : le second attend puis voit la base à jour
+                    cur.execute("SELECT pg_advisory_xact_lock(%s);", (SCHEMA_LOCK_ID,))
+                    if _schema_version(cur) < SCHEMA_VERSION:
+                        for stmt in MIGRATIONS:
+                            cur.execute(stmt)
+                        backfill_ids(cur)
+                        adopt_legacy_rows(cur)
+                        for stmt in POST_MIGRATIONS:
+                            cur.execute(stmt)
+                        cur.execute("INSERT INTO schema_version (version) VALUES (%s);", (SCHEMA_VERSION,))
+    finally:
+        conn.close()
+    _schema_ready = True
@@ -0,0 +1,90 @@
+import re
+import unicodedata
+from psycopg2.extras import execute_values
+
+
+def norm(s: str) -> str:
+    s = s.replace("\xa0", " ")
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def name_key(name: str) -> str:
+    """Clé de dédoublonnage : "Kylian  Mbappé" et "kylian mbappe" -> "kylian mbappe"."""
+    return norm(name).lower()
+
+
+def _upsert_dim(cur, table, extra_col, items):
+    """
+    items : {clé: (nom, valeur de extra_col)}. Crée les lignes manquantes, met à jour nom/image,
+    et renvoie {clé: id}. Une seule requête quel que soit le nombre d'éléments.
+    """
+    if not items:
+        return {}
+    sql = f"""
+    INSERT INTO {table} (key, name, {extra_col})
+    VALUES %s
+    ON CONFLICT (key)
+    DO UPDATE SET
+      name = EXCLUDED.name,
+      {extra_col} = COALESCE(EXCLUDED.{extra_col}, {table}.{extra_col})
+    RETURNING key, id;
+    """
+    # Toujours dans l'ordre des clés : deux transactions parallèles (buteurs / passeurs de la même saison)
+    # verrouillent les mêmes lignes dans le même ordre et ne peuvent pas s'interbloquer
+    values = [(k, name, extra) for k, (name, extra) in sorted(items.items())]
+    return dict(execute_values(cur, sql, values, fetch=True))
+
+
+def player_ids(cur, players):
+    """players : liste de (nom, photo_url) -> {clé normalisée: id}"""
+    items = {}
+    for name, photo_url in players:
+        items[name_key(name)] = (name, photo_url)
+    return _upsert_dim(cur, "players", "photo_url", items)
+
+
+def team_ids(cur, teams):
+    """teams : liste de (nom, logo_url) -> {clé normalisée: id}"""
+    items = {}
+    for name, logo_url in teams:
+        if name:
+            items[name_key(name)] = (name, logo_url)
+    return _upsert_dim(cur, "teams", "logo_url", items)
+
+
+def team_ids_by_logo(cur, logo_urls):
+    """
+    Les pages buteurs/passeurs n'affichent pas le nom du club, seulement son logo :
+    on retrouve l'équipe via le logo enregistré depuis le classement (None si inconnu).
+    """
+    logo_urls = [u for u in set(logo_urls) if u]
+    if not logo_urls:
+        return {}
+    cur.execute("SELECT logo_url, id FROM teams WHERE logo_url = ANY(%s);", (logo_urls,))
+    return dict(cur.fetchall())
+
+
+def backfill_ids(cur):
+    """Renseigne player_id / team_id des lignes écrites avant l'existence des tables de dimensions."""
+    cur.execute("SELECT DISTINCT team, logo_url FROM standings WHERE team_id IS NULL AND team IS NOT NULL;")
+    ids = team_ids(cur, cur.fetchall())
+    if ids:
+        cur.execute("SELECT id, team FROM standings WHERE team_id IS NULL AND team IS NOT NULL;")
+        updates = [(ids[name_key(team)], row_id) for row_id, team in cur.fetchall()]
+        execute_values(cur, "UPDATE standings s SET team_id = v.team_id FROM (VALUES %s) AS v(team_id, id) WHERE s.id = v.id;", updates)
+
+    for table in ("scorers", "assists"):
+        cur.execute(f"SELECT id, player_name, photo_url, logo_url FROM {table} WHERE player_id IS NULL;")
+        rows = cur.fetchall()
+        if not rows:
+            continue
+        pids = player_ids(cur, [(name, photo) for _, name, photo, _ in rows])
+        tids = team_ids_by_logo(cur, [logo for *_, logo in rows])
+        updates = [(pids[name_key(name)], tids.get(logo), row_id) for row_id, name, _, logo in rows]
+        execute_values(cur, f"""
+            UPDATE {table} t SET player_id = v.player_id, team_id = v.team_id
+            FROM (VALUES %s) AS v(player_id, team_id, id) WHERE t.id = v.id;
+        """, updates, template="(%s, %s::int, %s)")
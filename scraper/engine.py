@@ -0,0 +1,173 @@
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+from scraper.archive import archive_page
+from scraper.config import CURRENT_SEASON, DEFAULT_LEAGUE, LEAGUES, PAGES, build_url, expand_targets, targets_from_env
+from scraper.db import ensure_schema
+from scraper.fetch import BrowserSession, fetch_rendered_html
+from scraper.standings import parse_standings, upsert_standings
+from scraper.scorers import parse_scorers, upsert_scorers
+from scraper.assists import parse_assists, upsert_assists
+from scraper.runs import complete_scopes, publish, run_label, start_run
+
+# Concurrence globale (navigateurs ouverts en même temps) et par site
+MAX_CONCURRENCY = int(os.environ.get("SCRAPE_MAX_CONCURRENCY", "4"))
+PER_HOST_CONCURRENCY = int(os.environ.get("SCRAPE_PER_HOST_CONCURRENCY", "2"))
+# Délai minimum (secondes) entre deux chargements de page sur le même site
+PER_HOST_INTERVAL = float(os.environ.get("SCRAPE_PER_HOST_INTERVAL", "1.0"))
+
+# Type de page -> (parser, upsert) : on réutilise les mêmes chemins d'écriture que les scrapers unitaires
+HANDLERS = {
+    "standings": (parse_standings, upsert_standings),
+    "scorers": (parse_scorers, upsert_scorers),
+    "assists": (parse_assists, upsert_assists),
+}
+
+
+class HostLimiter:
+    """Limite le nombre de requêtes simultanées et leur cadence pour chaque hôte."""
+
+    def __init__(self, max_per_host: int = PER_HOST_CONCURRENCY, interval: float = PER_HOST_INTERVAL):
+        self.max_per_host = max_per_host
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def _wait_turn(self, host):
+        # Réserve le prochain créneau libre pour cet hôte puis attend qu'il arrive
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def fetch(self, url: str, **kwargs) -> str:
+        host = urlparse(url).netloc
+        with self._semaphore(host):
+            self._wait_turn(host)
+            return fetch_rendered_html(url, **kwargs)
+
+
+def scrape_target(target, limiter: HostLimiter, run_id: int, label: str, session: BrowserSession | None = None):
+    """Scrape une cible (championnat, saison, page) dans les lignes du run. Retourne le nombre de lignes."""
+    parse, upsert = HANDLERS[target.page]
+    url = build_url(target.league, target.season, target.page)
+    html = limiter.fetch(url, wait_text=PAGES[target.page]["wait_text"], session=session)
+    # On garde le HTML brut avant de parser : un bug de parser se corrige ensuite par replay
+    archive_page(html, url, target.page, league=target.league, season=target.season, run_label=label)
+    rows = parse(html, season=target.season, league=target.league)
+    # parse_scorers / parse_assists renvoient [] sans lever si aucune ligne ne correspond :
+    # publier ce run remplacerait les données affichées par une table vide
+    if not rows:
+        raise RuntimeError("aucune ligne parsée")
+    upsert(rows, run_id)
+    return len(rows)
+
+
+def _worker(tasks, results, limiter, run_id, label):
+    """
+    Un worker garde le même navigateur pour toutes ses pages (contexte chaud, consentement déjà fait).
+    Playwright sync n'est pas partageable entre threads : une session par worker.
+    """
+    with BrowserSession() as session:
+        while True:
+            try:
+                t = tasks.get_nowait()
+            except queue.Empty:
+                return
+            n, err = 0, None
+            try:
+                n = scrape_target(t, limiter, run_id, label, session)
+            except Exception as e:
+                err = e
+                # Navigateur peut-être dans un état incohérent : il sera relancé à la page suivante
+                session.close()
+            finally:
+                # Toujours un résultat par cible : run() en attend exactement len(targets)
+                results.put((t, n, err))
+
+
+def run(targets, max_workers: int = MAX_CONCURRENCY, limiter: HostLimiter | None = None, on_result=None,
+        run_id: int | None = None):
+    """
+    Scrape toutes les cibles en parallèle.
+    Une cible en échec n'arrête pas les autres : on renvoie (succès, échecs).
+    on_result(target, nb_lignes, erreur) est appelé dans le thread principal après chaque cible.
+
+    Sans run_id, un run est ouvert puis publié à la fin (seulement les championnats/saisons complets).
+    Avec run_id, c'est l'appelant qui publie (ex: run_all publie aussi le palmarès dans le même run).
+    """
+    limiter = limiter or HostLimiter()
+    owns_run = run_id is None
+    if owns_run:
+        # Avec run_id, l'appelant a déjà préparé le schéma
+        ensure_schema()
+        run_id = start_run()
+    label = run_label(run_id)
+    done, failed = [], []
+
+    tasks, results = queue.Queue(), queue.Queue()
+    for t in targets:
+        tasks.put(t)
+    workers = [
+        threading.Thread(target=_worker, args=(tasks, results, limiter, run_id, label), daemon=True)
+        for _ in range(min(max_workers, len(targets)))
+    ]
+    for w in workers:
+        w.start()
+
+    for _ in range(len(targets)):
+        t, n, e = results.get()
+        if e:
+            failed.append((t, e))
+            print(f"ECHEC: {t.league} {t.season} {t.page} -> {e}", file=sys.stderr)
+        else:
+            done.append((t, n))
+            print(f"OK: {t.league} {t.season} {t.page} -> {n} lignes")
+        if on_result:
+            on_result(t, n, e)
+
+    for w in workers:
+        w.join()
+
+    if owns_run:
+        publish(run_id, complete_scopes(done, failed))
+    return done, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape plusieurs championnats / saisons en parallèle.")
+    parser.add_argument("--league", action="append", choices=sorted(LEAGUES), help="répétable (défaut: SCRAPE_TARGETS ou LEAGUE)")
+    parser.add_argument("--season", action="append", help='ex: 2024/2025, répétable (défaut: SEASON)')
+    parser.add_argument("--page", action="append", choices=sorted(PAGES), help="répétable (défaut: toutes)")
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    if args.league or args.season:
+        targets = expand_targets(args.league or [DEFAULT_LEAGUE], args.season or [CURRENT_SEASON], args.page)
+    else:
+        targets = [t for t in targets_from_env() if not args.page or t.page in args.page]
+
+    print(f"{len(targets)} pages à scraper ({args.workers} en parallèle)...")
+    done, failed = run(targets, max_workers=args.workers)
+    print(f"Terminé : {len(done)} OK, {len(failed)} en échec.")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
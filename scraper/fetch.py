@@ -1,36 +1,185 @@
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
 from playwright.sync_api import sync_playwright, TimeoutError as PwTimeoutError
 
-def fetch_rendered_html(url: str, wait_text: str | None = None, timeout_ms: int = 45000) -> str:
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(
-            user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
-        )
-
-        page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
-
-        # Tentative de clic cookie (si présent)
-        for label in ["Tout accepter", "Accepter", "J'accepte", "OK"]:
-            try:
-                page.locator(f"button:has-text('{label}')").first.click(timeout=1500)
-                break
-            except Exception:
-                pass
-
-        # Laisse le JS charger
-        page.wait_for_timeout(3000)
-
-        # Certains sites chargent le tableau après un délai / lazy loading
-        page.mouse.wheel(0, 2000)
-        page.wait_for_timeout(2000)
-
-        if wait_text:
-            try:
-                page.wait_for_selector(f"text={wait_text}", timeout=timeout_ms)
-            except PwTimeoutError:
-                # On renvoie quand même le HTML pour debug
-                pass
-
-        html = page.content()
-        browser.close()
-        return html
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
+
+# Cookies + localStorage enregistrés après le premier clic sur le bandeau cookies
+STORAGE_STATE_PATH = os.environ.get("STORAGE_STATE_PATH", os.path.join("data", "playwright", "storage_state.json"))
+# Au-delà, on refait le consentement même si les cookies n'ont pas expiré (le site peut changer de bandeau)
+STORAGE_STATE_MAX_AGE = float(os.environ.get("STORAGE_STATE_MAX_AGE_HOURS", "168")) * 3600
+
+# Cache disque des fichiers statiques (css, js, polices, images) réutilisé d'un run à l'autre
+ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", os.path.join("data", "playwright", "assets"))
+ASSET_MAX_AGE = float(os.environ.get("ASSET_MAX_AGE_HOURS", "24")) * 3600
+CACHED_RESOURCE_TYPES = {"stylesheet", "script", "font", "image"}
+
+# Un seul locator pour tous les libellés : une attente de 1,5 s au lieu de 4
+CONSENT_BUTTON = re.compile(r"^\s*(Tout accepter|Accepter|J'accepte|OK)\s*$", re.IGNORECASE)
+# Noms des cookies / clés localStorage où les gestionnaires de consentement (TCF, Didomi, OneTrust...) gardent le choix
+CONSENT_KEY = re.compile(os.environ.get("CONSENT_KEY_PATTERN", r"consent|didomi|optanon|axeptio"), re.IGNORECASE)
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_storage_state():
+    """Renvoie l'état enregistré s'il est encore valable, sinon None (il faudra refaire le consentement)."""
+    try:
+        if time.time() - os.path.getmtime(STORAGE_STATE_PATH) > STORAGE_STATE_MAX_AGE:
+            return None
+        with open(STORAGE_STATE_PATH, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # expires = -1 pour un cookie de session ; sinon timestamp en secondes.
+    # Les cookies d'audience expirent vite (_gat : 1 min) : on les retire sans jeter le reste de l'état.
+    now = time.time()
+    cookies = [c for c in state.get("cookies", []) if not 0 < c.get("expires", -1) < now]
+    # On ne refait le consentement que si le choix du bandeau (cookie ou localStorage) n'y est plus
+    local_items = [item for origin in state.get("origins", []) for item in origin.get("localStorage", [])]
+    if not any(CONSENT_KEY.search(c["name"]) for c in cookies + local_items):
+        return None
+    state["cookies"] = cookies
+    return state
+
+
+def save_storage_state(context):
+    _atomic_write(STORAGE_STATE_PATH, json.dumps(context.storage_state()).encode("utf-8"))
+
+
+def _asset_paths(url: str):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    base = os.path.join(ASSET_CACHE_DIR, key[:2], key)
+    return base + ".body", base + ".json"
+
+
+def _serve_cached_assets(route):
+    request = route.request
+    if request.method != "GET" or request.resource_type not in CACHED_RESOURCE_TYPES:
+        route.continue_()
+        return
+
+    body_path, meta_path = _asset_paths(request.url)
+    try:
+        if time.time() - os.path.getmtime(body_path) < ASSET_MAX_AGE:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            route.fulfill(status=200, headers=meta["headers"], path=body_path)
+            return
+    except (OSError, ValueError):
+        pass
+
+    try:
+        response = route.fetch()
+    except Exception:
+        route.continue_()
+        return
+    if response.ok:
+        headers = {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "cache-control")}
+        _atomic_write(body_path, response.body())
+        _atomic_write(meta_path, json.dumps({"url": request.url, "headers": headers}).encode("utf-8"))
+    route.fulfill(response=response)
+
+
+class BrowserSession:
+    """
+    Navigateur + contexte gardés ouverts pour plusieurs pages (à utiliser dans un seul thread).
+    Le navigateur n'est lancé qu'au premier fetch : une erreur de lancement remonte comme un échec de page.
+    """
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self.consented = False
+
+    def _ensure_context(self):
+        if self._context:
+            return self._context
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True)
+        state = load_storage_state()
+        # Consentement déjà enregistré : on ne cherche pas le bandeau du tout
+        self.consented = state is not None
+        self._context = self._browser.new_context(user_agent=USER_AGENT, storage_state=state)
+        self._context.route("**/*", _serve_cached_assets)
+        return self._context
+
+    def _accept_cookies(self, page):
+        try:
+            page.get_by_role("button", name=CONSENT_BUTTON).first.click(timeout=1500)
+        except Exception:
+            return
+        # Laisse le bandeau écrire ses cookies / localStorage avant de les enregistrer
+        page.wait_for_timeout(500)
+        save_storage_state(self._context)
+        self.consented = True
+
+    def fetch(self, url: str, wait_text: str | None = None, timeout_ms: int = 45000) -> str:
+        context = self._ensure_context()
+        page = context.new_page()
+        try:
+            page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+
+            if not self.consented:
+                self._accept_cookies(page)
+
+            # Laisse le JS charger
+            page.wait_for_timeout(3000)
+
+            # Certains sites chargent le tableau après un délai / lazy loading
+            page.mouse.wheel(0, 2000)
+            page.wait_for_timeout(2000)
+
+            if wait_text:
+                try:
+                    page.wait_for_selector(f"text={wait_text}", timeout=timeout_ms)
+                except PwTimeoutError:
+                    # On renvoie quand même le HTML pour debug
+                    pass
+
+            return page.content()
+        finally:
+            page.close()
+
+    def close(self):
+        """Ne lève jamais : après un crash du navigateur, chaque fermeture peut échouer indépendamment."""
+        for close in (
+            self._context and self._context.close,
+            self._browser and self._browser.close,
+            self._playwright and self._playwright.stop,
+        ):
+            if close:
+                try:
+                    close()
+                except Exception:
+                    pass
+        # Toujours remis à zéro : le prochain fetch relance un navigateur neuf
+        self._context = self._browser = self._playwright = None
+        self.consented = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fetch_rendered_html(url: str, wait_text: str | None = None, timeout_ms: int = 45000,
+                        session: BrowserSession | None = None) -> str:
+    """Sans session, ouvre un navigateur le temps d'une page (scrapers lancés seuls)."""
+    if session:
+        return session.fetch(url, wait_text=wait_text, timeout_ms=timeout_ms)
+    with BrowserSession() as s:
+        return s.fetch(url, wait_text=wait_text, timeout_ms=timeout_ms)
@@ -5,6 +5,9 @@ import os
 import re
 from urllib.parse import urljoin
 from dotenv import load_dotenv
+from scraper.archive import archive_page
+from scraper.db import ALL_SEASONS, ensure_schema
+from scraper.runs import publish, run_label, start_run
 
 load_dotenv()
 
@@ -20,11 +23,14 @@ def get_conn():
         port=int(os.environ.get("POSTGRES_PORT", "5432")),
     )
 
-def scrape_palmares():
+def fetch_palmares_html():
     # La page palmarès est statique pas besoin de Playwright
     r = requests.get(URL)
     r.encoding = r.apparent_encoding 
-    soup = BeautifulSoup(r.text, "html.parser")
+    return r.text
+
+def parse_palmares(html: str):
+    soup = BeautifulSoup(html, "html.parser")
 
     clubs = []
     history = []
@@ -89,38 +95,46 @@ def scrape_palmares():
 
     return clubs, history
 
-def save_db(clubs, history):
+def scrape_palmares(label=None):
+    html = fetch_palmares_html()
+    archive_page(html, URL, "palmares", league="ligue-1", run_label=label)
+    return parse_palmares(html)
+
+def save_db(clubs, history, run_id):
+    # Les colonnes de logos sont ajoutées par ensure_schema (scraper/db.py)
     conn = get_conn()
     with conn:
         with conn.cursor() as cur:
-            # On s'assure que les colonnes existent (au cas où)
-            cur.execute("ALTER TABLE palmares_history ADD COLUMN IF NOT EXISTS winner_logo TEXT;")
-            cur.execute("ALTER TABLE palmares_history ADD COLUMN IF NOT EXISTS runner_up_logo TEXT;")
-            cur.execute("ALTER TABLE palmares_clubs ADD COLUMN IF NOT EXISTS logo_url TEXT;")
-
             for team, titles, logo in clubs:
                 cur.execute("""
-                    INSERT INTO palmares_clubs(team, titles, logo_url)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT(team)
+                    INSERT INTO palmares_clubs(run_id, team, titles, logo_url)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT(run_id, team)
                     DO UPDATE SET titles = EXCLUDED.titles, logo_url = EXCLUDED.logo_url;
-                """, (team, titles, logo))
+                """, (run_id, team, titles, logo))
 
             for season, w_name, w_logo, r_name, r_logo in history:
                 cur.execute("""
-                    INSERT INTO palmares_history(season, winner, winner_logo, runner_up, runner_up_logo)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT(season)
+                    INSERT INTO palmares_history(run_id, season, winner, winner_logo, runner_up, runner_up_logo)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT(run_id, season)
                     DO UPDATE SET 
                         winner=EXCLUDED.winner, winner_logo=EXCLUDED.winner_logo,
                         runner_up=EXCLUDED.runner_up, runner_up_logo=EXCLUDED.runner_up_logo;
-                """, (season, w_name, w_logo, r_name, r_logo))
+                """, (run_id, season, w_name, w_logo, r_name, r_logo))
     conn.close()
 
-def main():
+def main(run_id=None):
+    """Sans run_id, le palmarès est publié tout seul ; sinon c'est le run appelant (run_all) qui publie."""
     print("Scraping des palmarès et des logos...")
-    c, h = scrape_palmares()
-    save_db(c, h)
+    owns_run = run_id is None
+    if owns_run:
+        ensure_schema()
+        run_id = start_run()
+    c, h = scrape_palmares(label=run_label(run_id))
+    save_db(c, h, run_id)
+    if owns_run:
+        publish(run_id, [("ligue-1", ALL_SEASONS, "palmares")])
     print(f"Terminé ! {len(c)} clubs et {len(h)} saisons avec logos.")
 
 if __name__ == "__main__":
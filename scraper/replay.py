@@ -0,0 +1,136 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from scraper.archive import new_run_label, read_blob
+from scraper.config import LEAGUES, PAGES, seasons_between
+from scraper.db import ALL_SEASONS, ensure_schema, get_conn
+from scraper.standings import parse_standings, upsert_standings
+from scraper.scorers import parse_scorers, upsert_scorers
+from scraper.assists import parse_assists, upsert_assists
+from scraper.palmares import parse_palmares, save_db
+from scraper.runs import publish, start_run
+
+REPLAY_PAGES = list(PAGES) + ["palmares"]
+
+PARSERS = {
+    "standings": parse_standings,
+    "scorers": parse_scorers,
+    "assists": parse_assists,
+}
+
+UPSERTS = {
+    "standings": upsert_standings,
+    "scorers": upsert_scorers,
+    "assists": upsert_assists,
+}
+
+
+def select_entries(leagues=None, seasons=None, pages=None, run_label=None, until=None):
+    """
+    Dernière page archivée pour chaque (championnat, saison, type) du périmètre.
+    until (ex: "2025-11-01") permet de rejouer l'état du site à une date passée.
+    """
+    sql = """
+        SELECT DISTINCT ON (league, season, page) league, season, page, sha256, fetched_at
+        FROM page_archive
+        WHERE page = ANY(%s::text[])
+          AND (%s::text[] IS NULL OR league = ANY(%s::text[]))
+          AND (season IS NULL OR %s::text[] IS NULL OR season = ANY(%s::text[]))
+          AND (%s::text IS NULL OR run_label = %s::text)
+          AND (%s::timestamp IS NULL OR fetched_at <= %s::timestamp)
+        ORDER BY league, season, page, fetched_at DESC;
+    """
+    params = (pages or REPLAY_PAGES, leagues, leagues, seasons, seasons, run_label, run_label, until, until)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def parse_entry(entry):
+    """Exécuté dans un processus fils : décompression + parsing, sans accès à la base."""
+    html = read_blob(entry["sha256"])
+    if entry["page"] == "palmares":
+        parsed = parse_palmares(html)
+        empty = not parsed[0]
+    else:
+        parsed = PARSERS[entry["page"]](html, season=entry["season"], league=entry["league"])
+        empty = not parsed
+    # Page vide = échec : sa saison garde la version publiée au lieu d'une table vide
+    if empty:
+        raise RuntimeError("aucune ligne parsée")
+    return entry, parsed
+
+
+def replay(entries, workers=None):
+    """Re-parse les pages dans un nouveau run, publié à la fin comme un scraping normal."""
+    ensure_schema()
+    run_id = start_run(f"replay-{new_run_label()}")
+    rows_by_page = {page: [] for page in UPSERTS}
+    palmares = []
+    failed = []
+
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # On soumet tout d'un coup, les résultats reviennent dans l'ordre des entrées
+        futures = [pool.submit(parse_entry, e) for e in entries]
+        for e, fut in zip(entries, futures):
+            try:
+                _, parsed = fut.result()
+            except Exception as err:
+                failed.append((e, err))
+                print(f"ECHEC: {e['league']} {e['season']} {e['page']} ({e['sha256'][:12]}) -> {err}")
+                continue
+            if e["page"] == "palmares":
+                palmares.append(parsed)
+            else:
+                rows_by_page[e["page"]] += parsed
+
+    # Chargement en base : un seul upsert (execute_values) par table
+    for page, rows in rows_by_page.items():
+        if rows:
+            UPSERTS[page](rows, run_id)
+            print(f"OK: {len(rows)} lignes rechargées dans {page}")
+    for clubs, history in palmares:
+        save_db(clubs, history, run_id)
+        print(f"OK: palmarès rechargé ({len(clubs)} clubs, {len(history)} saisons)")
+
+    # Comme pour un scraping : une saison dont une page a échoué garde sa version publiée
+    broken = {(e["league"], e["season"]) for e, _ in failed}
+    publish(run_id, [
+        (e["league"], e["season"] or ALL_SEASONS, e["page"])
+        for e in entries
+        if (e["league"], e["season"]) not in broken
+    ])
+
+    print(f"Replay terminé : {len(entries) - len(failed)} pages en {time.monotonic() - started:.1f}s, "
+          f"{len(failed)} en échec.")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse les pages archivées, sans retourner sur le site.")
+    parser.add_argument("--league", action="append", choices=sorted(LEAGUES), help="répétable (défaut: tous)")
+    parser.add_argument("--from", dest="first", help="première saison, ex: 2014/2015")
+    parser.add_argument("--to", dest="last", help="dernière saison (défaut: --from)")
+    parser.add_argument("--page", action="append", choices=REPLAY_PAGES, help="répétable (défaut: toutes)")
+    parser.add_argument("--run", help="rejoue uniquement les pages d'un run (label de scrape_runs, ex: 20261019T101500-3f2a9c)")
+    parser.add_argument("--until", help="état archivé à cette date, ex: 2025-11-01")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    seasons = seasons_between(args.first, args.last or args.first) if args.first else None
+    entries = select_entries(args.league, seasons, args.page, run_label=args.run, until=args.until)
+    print(f"{len(entries)} pages archivées à rejouer ({args.workers} processus)...")
+    if entries and replay(entries, workers=args.workers):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,35 @@
 import sys
 
-from scraper.standings import main as standings_main
-from scraper.scorers import main as scorers_main
-from scraper.assists import main as assists_main
+from scraper.config import targets_from_env
+from scraper.db import ALL_SEASONS, ensure_schema
+from scraper.engine import run
 from scraper.palmares import main as palmares_main
+from scraper.runs import complete_scopes, publish, start_run
 
 
 def main():
-    print("Run all scrapers (standings, scorers, assists, palmares)...")
-    standings_main()
-    scorers_main()
-    assists_main()
-    palmares_main()
+    targets = targets_from_env()
+    print(f"Run all scrapers ({len(targets)} pages standings/scorers/assists + palmares)...")
+    ensure_schema()
+    run_id = start_run()
+    done, failed = run(targets, run_id=run_id)
+    to_publish = complete_scopes(done, failed)
+
+    palmares_error = None
+    try:
+        palmares_main(run_id=run_id)
+        to_publish.append(("ligue-1", ALL_SEASONS, "palmares"))
+    except Exception as e:
+        palmares_error = e
+
+    # Tout ce qui a réussi devient visible d'un coup pour le dashboard
+    publish(run_id, to_publish)
+    print(f"Run {run_id} publié ({len(to_publish)} pages).")
+
+    if palmares_error:
+        raise palmares_error
+    if failed:
+        raise RuntimeError(f"{len(failed)} page(s) en échec sur {len(targets)}")
     print("Done.")
 
 
@@ -0,0 +1,134 @@
+from psycopg2.extras import execute_values
+
+from scraper.archive import new_run_label
+from scraper.db import RUN_TABLES, get_conn
+
+
+def start_run(label: str | None = None) -> int:
+    """Ouvre un run et renvoie son id (entier) ; label est l'identifiant lisible utilisé par l'archive."""
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO scrape_runs (label, status) VALUES (%s, 'running') RETURNING id;",
+                    (label or new_run_label(),),
+                )
+                return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run_label(run_id: int) -> str:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT label FROM scrape_runs WHERE id = %s;", (run_id,))
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def publish_pages(cur, pages):
+    """
+    pages : liste de (league, season, page, run_id).
+    Bascule les pointeurs lus par le dashboard ; à exécuter dans une seule transaction.
+    """
+    if not pages:
+        return
+    # Runs actuellement publiés sur ces pages (FOR UPDATE : une publication concurrente attend la nôtre)
+    replaced = execute_values(cur, """
+        SELECT p.run_id FROM published_runs p
+        JOIN (VALUES %s) AS v(league, season, page) USING (league, season, page)
+        FOR UPDATE OF p;
+    """, [(league, season, page) for league, season, page, _ in pages], fetch=True)
+
+    execute_values(cur, """
+        INSERT INTO published_runs (league, season, page, run_id)
+        VALUES %s
+        ON CONFLICT (league, season, page)
+        DO UPDATE SET run_id = EXCLUDED.run_id, published_at = CURRENT_TIMESTAMP;
+    """, pages)
+
+    # Un run qui n'est plus désigné par aucun pointeur est "remplacé" à partir de maintenant :
+    # c'est depuis ce moment que court le délai de grâce de prune_runs
+    cur.execute("""
+        UPDATE scrape_runs r SET superseded_at = CURRENT_TIMESTAMP
+        WHERE r.id = ANY(%s)
+          AND NOT EXISTS (SELECT 1 FROM published_runs p WHERE p.run_id = r.id);
+    """, (list({r[0] for r in replaced}),))
+
+
+def complete_scopes(done, failed):
+    """
+    Ne garde que les (championnat, saison) dont toutes les pages demandées ont réussi :
+    on ne publie jamais un nouveau classement à côté d'anciens buteurs.
+    """
+    broken = {(t.league, t.season) for t, _ in failed}
+    return [t for t, _ in done if (t.league, t.season) not in broken]
+
+
+def _finish(cur, run_id: int, status: str):
+    cur.execute(
+        "UPDATE scrape_runs SET status = %s, finished_at = CURRENT_TIMESTAMP WHERE id = %s;",
+        (status, run_id),
+    )
+
+
+def finish_run(run_id: int, status: str):
+    """Clôt un run dont les pages ont déjà été publiées au fil de l'eau (backfill)."""
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                _finish(cur, run_id, status)
+    finally:
+        conn.close()
+    prune_runs()
+
+
+def publish(run_id: int, targets):
+    """
+    Publie d'un coup toutes les pages du run (targets : Target ou tuples league, season, page).
+    Pointeurs et statut du run changent dans la même transaction : les lecteurs voient l'ancien
+    run ou le nouveau, jamais un mélange.
+    """
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                publish_pages(cur, [(league, season, page, run_id) for league, season, page in targets])
+                _finish(cur, run_id, "published" if targets else "failed")
+    finally:
+        conn.close()
+    prune_runs()
+
+
+def prune_runs():
+    """Supprime les lignes des runs terminés qui ne sont plus (ou n'ont jamais été) publiés."""
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                # Délai de grâce compté depuis la perte du dernier pointeur (superseded_at) : le dashboard
+                # et l'API gardent le pointeur en cache quelques secondes et lisent encore l'ancien run.
+                # Un run resté "running" plus d'un jour a planté : on le considère comme abandonné.
+                cur.execute("""
+                    SELECT id FROM scrape_runs r
+                    WHERE ((status <> 'running' AND finished_at < CURRENT_TIMESTAMP - INTERVAL '10 minutes')
+                           OR started_at < CURRENT_TIMESTAMP - INTERVAL '1 day')
+                      AND (superseded_at IS NULL OR superseded_at < CURRENT_TIMESTAMP - INTERVAL '10 minutes')
+                      AND status <> 'pruned'
+                      AND NOT EXISTS (SELECT 1 FROM published_runs p WHERE p.run_id = r.id)
+                      -- pages de backfill terminées mais dont la saison n'est pas encore complète
+                      AND NOT EXISTS (SELECT 1 FROM backfill_progress b WHERE b.run_id = r.id AND b.status = 'done');
+                """)
+                stale = [r[0] for r in cur.fetchall()]
+                if not stale:
+                    return
+                for table in RUN_TABLES:
+                    cur.execute(f"DELETE FROM {table} WHERE run_id = ANY(%s);", (stale,))
+                cur.execute("UPDATE scrape_runs SET status = 'pruned' WHERE id = ANY(%s);", (stale,))
+    finally:
+        conn.close()
+
@@ -3,12 +3,11 @@ import unicodedata
 from psycopg2.extras import execute_values
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from scraper.db import get_conn
+from scraper.config import BASE, CURRENT_SEASON, DEFAULT_LEAGUE, PAGES, build_url
+from scraper.db import ensure_schema, get_conn
+from scraper.dims import name_key, player_ids, team_ids_by_logo
 from scraper.fetch import fetch_rendered_html
-
-URL = "https://www.footmercato.net/france/ligue-1/buteur"
-SEASON = "2025/2026"
-BASE = "https://www.footmercato.net"
+from scraper.runs import publish, start_run
 
 def clean_player_name(raw_name):
     """Retire les codes de poste (BU, MC...) parfois collés au nom sur le site."""
@@ -20,7 +19,7 @@ def clean_player_name(raw_name):
         parts.pop()
     return " ".join(parts).strip()
 
-def parse_scorers(html: str):
+def parse_scorers(html: str, season: str = CURRENT_SEASON, league: str = DEFAULT_LEAGUE):
     soup = BeautifulSoup(html, "html.parser")
     table = soup.find("table")
     if not table:
@@ -65,7 +64,8 @@ def parse_scorers(html: str):
 
         if player_name:
             rows.append({
-                "season": SEASON,
+                "league": league,
+                "season": season,
                 "rank": rank,
                 "player_name": player_name,
                 "team": None,
@@ -77,42 +77,46 @@ def parse_scorers(html: str):
 
     return rows
 
-def upsert_scorers(rows):
-    conn = get_conn()
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute("ALTER TABLE scorers ADD COLUMN IF NOT EXISTS photo_url TEXT;")
-            cur.execute("ALTER TABLE scorers ADD COLUMN IF NOT EXISTS logo_url TEXT;")
-    
+def upsert_scorers(rows, run_id: int):
     sql = """
-    INSERT INTO scorers (season, rank, player_name, team, goals, penalties, photo_url, logo_url)
+    INSERT INTO scorers (run_id, league, season, rank, player_name, team, player_id, team_id, goals, penalties, photo_url, logo_url)
     VALUES %s
-    ON CONFLICT (season, player_name)
+    ON CONFLICT (run_id, league, season, player_id)
     DO UPDATE SET
       rank = EXCLUDED.rank,
+      player_name = EXCLUDED.player_name,
+      team_id = EXCLUDED.team_id,
       goals = EXCLUDED.goals,
       penalties = EXCLUDED.penalties,
       photo_url = EXCLUDED.photo_url,
       logo_url = EXCLUDED.logo_url,
       scraped_at = CURRENT_TIMESTAMP;
     """
-    values = [
-        (r["season"], r["rank"], r["player_name"], r["team"], 
-         r["goals"], r["penalties"], r["photo_url"], r["logo_url"]) 
-        for r in rows
-    ]
-
+    conn = get_conn()
     try:
         with conn:
             with conn.cursor() as cur:
-                execute_values(cur, sql, values)
+                pids = player_ids(cur, [(r["player_name"], r["photo_url"]) for r in rows])
+                tids = team_ids_by_logo(cur, [r["logo_url"] for r in rows])
+                # Une ligne par joueur : deux orthographes du même nom ne doivent pas entrer en conflit
+                values = {}
+                for r in rows:
+                    pid = pids[name_key(r["player_name"])]
+                    values.setdefault((r["league"], r["season"], pid), (
+                        run_id, r["league"], r["season"], r["rank"], r["player_name"], r["team"], pid,
+                        tids.get(r["logo_url"]), r["goals"], r["penalties"], r["photo_url"], r["logo_url"]
+                    ))
+                execute_values(cur, sql, list(values.values()))
     finally:
         conn.close()
 
-def main():
-    html = fetch_rendered_html(URL, wait_text="Buteurs")
-    rows = parse_scorers(html)
-    upsert_scorers(rows)
+def main(league: str = DEFAULT_LEAGUE, season: str = CURRENT_SEASON):
+    ensure_schema()
+    html = fetch_rendered_html(build_url(league, season, "scorers"), wait_text=PAGES["scorers"]["wait_text"])
+    rows = parse_scorers(html, season=season, league=league)
+    run_id = start_run()
+    upsert_scorers(rows, run_id)
+    publish(run_id, [(league, season, "scorers")])
     print(f"OK: {len(rows)} buteurs mis à jour avec images et noms nettoyés.")
 
 if __name__ == "__main__":
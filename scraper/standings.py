@@ -1,25 +1,14 @@
 import re
-import unicodedata
 from psycopg2.extras import execute_values
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from scraper.db import get_conn
+from scraper.config import BASE, CURRENT_SEASON, DEFAULT_LEAGUE, PAGES, build_url
+from scraper.db import ensure_schema, get_conn
+from scraper.dims import name_key, team_ids
 from scraper.fetch import fetch_rendered_html
+from scraper.runs import publish, start_run
 
-URL = "https://www.footmercato.net/france/ligue-1/classement"
-SEASON = "2025/2026"
-
-def norm(s: str) -> str:
-    s = s.replace("\xa0", " ")
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(c for c in s if not unicodedata.combining(c))
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-
-BASE = "https://www.footmercato.net"
-
-def parse_standings(html: str):
+def parse_standings(html: str, season: str = CURRENT_SEASON, league: str = DEFAULT_LEAGUE):
     soup = BeautifulSoup(html, "html.parser")
 
     def to_int(td):
@@ -93,7 +82,8 @@ def parse_standings(html: str):
 
 
         rows.append({
-            "season": "2025/2026",
+            "league": league,
+            "season": season,
             "rank": rank,
             "team": team,
             "played": played,
@@ -113,14 +103,15 @@ def parse_standings(html: str):
     return rows
 
 
-def upsert_standings(rows):
+def upsert_standings(rows, run_id: int):
     sql = """
     INSERT INTO standings
-    (season, rank, team, played, wins, draws, losses, goals_for, goals_against, goal_diff, points, logo_url)
+    (run_id, league, season, rank, team, team_id, played, wins, draws, losses, goals_for, goals_against, goal_diff, points, logo_url)
     VALUES %s
-    ON CONFLICT (season, team)
+    ON CONFLICT (run_id, league, season, team_id)
     DO UPDATE SET
       rank = EXCLUDED.rank,
+      team = EXCLUDED.team,
       played = EXCLUDED.played,
       wins = EXCLUDED.wins,
       draws = EXCLUDED.draws,
@@ -133,27 +124,33 @@ def upsert_standings(rows):
       scraped_at = CURRENT_TIMESTAMP;
     """
 
-    values = [
-        (
-            r["season"], r["rank"], r["team"], r["played"],
-            r["wins"], r["draws"], r["losses"],
-            r["goals_for"], r["goals_against"], r["goal_diff"], r["points"], r.get("logo_url")
-        )
-        for r in rows
-    ]
-
     conn = get_conn()
     try:
         with conn:
             with conn.cursor() as cur:
-                execute_values(cur, sql, values)
+                ids = team_ids(cur, [(r["team"], r.get("logo_url")) for r in rows])
+                # Une ligne par équipe : deux orthographes du même club ne doivent pas entrer en conflit
+                # (sans nom d'équipe, team_id est NULL et la ligne ne peut pas entrer en conflit)
+                values = {}
+                for r in rows:
+                    tid = ids[name_key(r["team"])] if r["team"] else None
+                    key = (r["league"], r["season"], tid if tid is not None else f"rank-{r['rank']}")
+                    values.setdefault(key, (
+                        run_id, r["league"], r["season"], r["rank"], r["team"], tid, r["played"],
+                        r["wins"], r["draws"], r["losses"],
+                        r["goals_for"], r["goals_against"], r["goal_diff"], r["points"], r.get("logo_url")
+                    ))
+                execute_values(cur, sql, list(values.values()))
     finally:
         conn.close()
 
-def main():
-    html = fetch_rendered_html(URL)
-    rows = parse_standings(html)
-    upsert_standings(rows)
+def main(league: str = DEFAULT_LEAGUE, season: str = CURRENT_SEASON):
+    ensure_schema()
+    html = fetch_rendered_html(build_url(league, season, "standings"), wait_text=PAGES["standings"]["wait_text"])
+    rows = parse_standings(html, season=season, league=league)
+    run_id = start_run()
+    upsert_standings(rows, run_id)
+    publish(run_id, [(league, season, "standings")])
     print(f"OK: {len(rows)} lignes insérées/maj dans standings.")
 
 if __name__ == "__main__":
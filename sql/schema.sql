@@ -1,10 +1,60 @@
+-- Dimensions : une ligne par équipe / joueur, clé = nom normalisé (sans accents, minuscules)
+
+CREATE TABLE IF NOT EXISTS teams (
+  id SERIAL PRIMARY KEY,
+  key VARCHAR(120) NOT NULL UNIQUE,
+  name VARCHAR(120) NOT NULL,
+  logo_url TEXT
+);
+
+CREATE INDEX IF NOT EXISTS teams_logo_url_idx ON teams (logo_url);
+
+CREATE TABLE IF NOT EXISTS players (
+  id SERIAL PRIMARY KEY,
+  key VARCHAR(120) NOT NULL UNIQUE,
+  name VARCHAR(120) NOT NULL,
+  photo_url TEXT
+);
+
+-- Version des migrations appliquées par scraper/db.py (ensure_schema les joue une seule fois)
+CREATE TABLE IF NOT EXISTS schema_version (
+  version INT NOT NULL,
+  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Runs : chaque passage de scraping écrit ses propres lignes (run_id) ;
+-- published_runs désigne, pour chaque (championnat, saison, page), le run lu par le dashboard.
+-- Publier un run = mettre à jour ces pointeurs dans une seule transaction.
+
+CREATE TABLE IF NOT EXISTS scrape_runs (
+  id SERIAL PRIMARY KEY,
+  label VARCHAR(40) NOT NULL UNIQUE,
+  status VARCHAR(10) NOT NULL,
+  started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  finished_at TIMESTAMP,
+  -- plus aucun pointeur publié depuis cette date (point de départ du délai avant suppression)
+  superseded_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS published_runs (
+  league VARCHAR(50) NOT NULL,
+  season VARCHAR(20) NOT NULL,
+  page VARCHAR(20) NOT NULL,
+  run_id INT NOT NULL REFERENCES scrape_runs(id),
+  published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (league, season, page)
+);
+
 -- Tables principales
 
 CREATE TABLE IF NOT EXISTS standings (
   id SERIAL PRIMARY KEY,
+  run_id INT REFERENCES scrape_runs(id),
+  league VARCHAR(50) NOT NULL DEFAULT 'ligue-1',
   season VARCHAR(20),
   rank INT,
   team VARCHAR(100),
+  team_id INT REFERENCES teams(id),
   played INT,
   wins INT,
   draws INT,
@@ -15,54 +65,96 @@ CREATE TABLE IF NOT EXISTS standings (
   points INT,
   logo_url TEXT,
   scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  UNIQUE (season, team)
+  UNIQUE (run_id, league, season, team_id)
 );
 
 CREATE TABLE IF NOT EXISTS scorers (
   id SERIAL PRIMARY KEY,
+  run_id INT REFERENCES scrape_runs(id),
+  league VARCHAR(50) NOT NULL DEFAULT 'ligue-1',
   season VARCHAR(20),
   rank INT,
   player_name VARCHAR(120),
   team VARCHAR(120),
+  player_id INT REFERENCES players(id),
+  team_id INT REFERENCES teams(id),
   goals INT,
   penalties INT,
   team_logo_url TEXT,
   photo_url TEXT,
   logo_url TEXT,
   scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  UNIQUE (season, player_name)
+  UNIQUE (run_id, league, season, player_id)
 );
 
 CREATE TABLE IF NOT EXISTS assists (
   id SERIAL PRIMARY KEY,
+  run_id INT REFERENCES scrape_runs(id),
+  league VARCHAR(50) NOT NULL DEFAULT 'ligue-1',
   season VARCHAR(20) NOT NULL,
   rank INT,
   player_name VARCHAR(120) NOT NULL,
   team VARCHAR(120),
+  player_id INT REFERENCES players(id),
+  team_id INT REFERENCES teams(id),
   assists INT,
   team_logo_url TEXT,
   photo_url TEXT,
   logo_url TEXT,
   scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  UNIQUE (season, player_name)
+  UNIQUE (run_id, league, season, player_id)
 );
 
 -- Palmarès
 
 CREATE TABLE IF NOT EXISTS palmares_clubs (
   id SERIAL PRIMARY KEY,
-  team VARCHAR(120) NOT NULL UNIQUE,
+  run_id INT REFERENCES scrape_runs(id),
+  team VARCHAR(120) NOT NULL,
   titles INT NOT NULL DEFAULT 0,
   logo_url TEXT,
-  scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE (run_id, team)
 );
 
 CREATE TABLE IF NOT EXISTS palmares_history (
   id SERIAL PRIMARY KEY,
-  season VARCHAR(20) NOT NULL UNIQUE,
+  run_id INT REFERENCES scrape_runs(id),
+  season VARCHAR(20) NOT NULL,
   winner VARCHAR(120),
   runner_up VARCHAR(120),
   winner_logo TEXT,
   runner_up_logo TEXT,
-  scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE (run_id, season)
 );
+
+-- Backfill historique : une ligne par page (championnat, saison, type) terminée ou en échec
+
+CREATE TABLE IF NOT EXISTS backfill_progress (
+  league VARCHAR(50) NOT NULL,
+  season VARCHAR(20) NOT NULL,
+  page VARCHAR(20) NOT NULL,
+  status VARCHAR(10) NOT NULL,
+  rows INT,
+  error TEXT,
+  run_id INT,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (league, season, page)
+);
+
+-- Archive des pages HTML brutes (contenu compressé sur disque, adressé par sha256)
+
+CREATE TABLE IF NOT EXISTS page_archive (
+  id SERIAL PRIMARY KEY,
+  run_label VARCHAR(40), -- scrape_runs.label
+  league VARCHAR(50),
+  season VARCHAR(20),
+  page VARCHAR(20) NOT NULL,
+  url TEXT NOT NULL,
+  sha256 CHAR(64) NOT NULL,
+  size_bytes INT,
+  fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS page_archive_target_idx ON page_archive (league, season, page, fetched_at);